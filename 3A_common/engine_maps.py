@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Engine_maps gathers the engine map utilities shared by the gasoline (3A_gasoline) and electric (3A_powertrain_elec) parametrizations: WOT envelope and operating grids."""
+
+from functools import cached_property
+import numpy as np
+
+
+def calculate_T_WOT(rpm_values, torque_values):
+    """
+    Calculate the CWOT (maximum torque for each unique RPM value).
+
+    Parameters:
+    rpm_values (array): Array of RPM values in ascending order.
+    torque_values (array): Array of corresponding torque values.
+
+    Returns:
+    array: Array where each unique RPM has its maximum torque repeated across its occurrences.
+    """
+    # Last index of each RPM (where the RPM changes) and number of occurrences of each RPM
+    rpm_change_indices = np.concatenate((np.where(np.diff(rpm_values) > 0)[0], [len(rpm_values) - 1]))
+    segment_lengths = np.diff(np.concatenate(([0], rpm_change_indices + 1)))
+    return np.repeat(torque_values[rpm_change_indices], segment_lengths)
+
+
+def wot_envelope(rpm_values, torque_wot_values):
+    """
+    WOT envelope of a map: one point per unique RPM.
+
+    Parameters:
+    rpm_values (array): Array of RPM values in ascending order.
+    torque_wot_values (array): Array of corresponding WOT torque values (see calculate_T_WOT).
+
+    Returns:
+    tuple: Unique RPM values and their WOT torque.
+    """
+    rpm_values = np.asarray(rpm_values)
+    first = np.concatenate(([True], np.diff(rpm_values) > 0))
+    return rpm_values[first], np.asarray(torque_wot_values)[first]
+
+
+def wot_boundary(rpm_range, rpm_values, torque_wot_values):
+    """
+    Interpolate the WOT boundary for many RPM values at once (vectorized calculate_wot_boundary of the notebooks:
+    the first torque below the first RPM, linear interpolation from the point preceding each RPM otherwise).
+
+    Parameters:
+    rpm_range (array): RPM values for which the WOT boundary is calculated (up to the last RPM of the map).
+    rpm_values (array): Array of RPM values in ascending order.
+    torque_wot_values (array): Array of corresponding WOT torque values.
+
+    Returns:
+    array: Interpolated WOT boundary torque for each RPM of rpm_range.
+    """
+    rpm_values = np.asarray(rpm_values, dtype=float)
+    torque_wot_values = np.asarray(torque_wot_values, dtype=float)
+    rpm_range = np.asarray(rpm_range, dtype=float)
+
+    index = np.searchsorted(rpm_values, rpm_range)
+    upper = np.clip(index, 1, len(rpm_values) - 1)
+    rpm_lower, rpm_upper = rpm_values[upper - 1], rpm_values[upper]
+    torque_lower, torque_upper = torque_wot_values[upper - 1], torque_wot_values[upper]
+
+    # Points before the first RPM are taken from the first torque (and may divide by zero on repeated RPMs)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        interpolated = torque_lower + (torque_upper - torque_lower) * (rpm_range - rpm_lower) / (rpm_upper - rpm_lower)
+    return np.where(index == 0, torque_wot_values[0], interpolated)
+
+
+def wot_interp(rpm_range, rpm_values, torque_wot_values):
+    """
+    np.interp equivalent of wot_boundary on the WOT envelope (constant beyond the map).
+    """
+    rpm_envelope, torque_envelope = wot_envelope(rpm_values, torque_wot_values)
+    return np.interp(rpm_range, rpm_envelope, torque_envelope)
+
+
+class EngineGrid:
+    """
+    Operating grid of an engine map (RPM along the columns, torque along the rows), as plotted by plot_maps in the
+    parametrization notebooks. The axes are kept 1-D and broadcast; every grid is evaluated on first access only.
+
+    Parameters:
+    rpm_values (array): RPM values of the map in ascending order.
+    torque_wot (array): WOT torque of each map point (see calculate_T_WOT).
+    step (float): RPM step of the grid.
+    motoring (bool): Whether the grid spans negative torques too (electric motors).
+    """
+    def __init__(self, rpm_values, torque_wot, step=20, motoring=False):
+        self.rpm_values = np.asarray(rpm_values, dtype=float)
+        self.torque_wot = np.asarray(torque_wot, dtype=float)
+        self.step = step
+        self.motoring = motoring
+
+    @cached_property
+    def rpm(self):
+        return np.arange(self.rpm_values[0], np.max(self.rpm_values), self.step)
+
+    @cached_property
+    def torque(self):
+        torque_max = np.abs(np.max(self.torque_wot)) + 10
+        return np.linspace(-torque_max if self.motoring else 0, torque_max, len(self.rpm))[:, None]
+
+    @cached_property
+    def angular_velocity(self):
+        return self.rpm * 2 * np.pi / 60
+
+    @cached_property
+    def wot(self):
+        return wot_interp(self.rpm, self.rpm_values, self.torque_wot)
+
+    @cached_property
+    def outside(self):
+        """Grid points beyond the WOT boundary."""
+        return (np.abs(self.torque) if self.motoring else self.torque) > self.wot
+
+    def meshgrid(self):
+        return np.broadcast_arrays(self.rpm, self.torque)
+
+
+class ThermalGrid(EngineGrid):
+    """
+    Efficiency and BSFC grids of a gasoline engine.
+
+    Parameters:
+    rpm_values, torque_wot: see EngineGrid.
+    parameters (tuple): Engine parameters (n_i, fmep0, p0, Q0, D).
+    """
+    def __init__(self, rpm_values, torque_wot, parameters, step=20):
+        super().__init__(rpm_values, torque_wot, step)
+        self.parameters = parameters
+
+    @cached_property
+    def efficiency(self):
+        n_i, fmep0, p0, Q0, D = self.parameters
+        power = self.torque * self.angular_velocity
+        return power / (
+            power / n_i +
+            (fmep0 * self.angular_velocity * D) / (4 * np.pi * n_i) +
+            (p0 * self.angular_velocity ** 3 * D) / (4 * np.pi * n_i) +
+            (Q0 * D) / n_i
+        )
+
+    @cached_property
+    def bsfc(self):
+        """Fuel consumption [g/kWh], 0 beyond the WOT boundary."""
+        with np.errstate(divide='ignore'):
+            return np.where(self.outside, 0, 3600 / (self.efficiency * 43.5))
+
+
+class ElectricGrid(EngineGrid):
+    """
+    Electric power grid of an electric motor.
+
+    Parameters:
+    rpm_values, torque_wot: see EngineGrid.
+    parameters (tuple): Motor parameters (n_i, alpha, epsilon, betha).
+    """
+    def __init__(self, rpm_values, torque_wot, parameters, step=20):
+        super().__init__(rpm_values, torque_wot, step, motoring=True)
+        self.parameters = parameters
+
+    @cached_property
+    def power(self):
+        """Electric power [kW], -1000 beyond the WOT boundary."""
+        n_i, alpha, epsilon, betha = self.parameters
+        power = (self.torque * self.angular_velocity / n_i +
+                 alpha * self.angular_velocity / n_i +
+                 epsilon * (self.torque ** 2) / n_i +
+                 betha / n_i) / 1000
+        return np.where(self.outside, -1000, power)
+
+
+def plot_contours(ax, grid, values, levels, label):
+    """
+    Contour map of a grid with labelled lines.
+    """
+    RPM_grid, torque_grid = grid.meshgrid()
+    contour_lines = ax.contour(RPM_grid, torque_grid, values, levels=levels, colors='k')
+    ax.clabel(contour_lines, levels=levels[1:], inline=True, fontsize=12)
+    filled = ax.contourf(RPM_grid, torque_grid, values, levels=levels, cmap='Spectral')
+    ax.figure.colorbar(filled, ax=ax, label=label)
+    ax.set_xlabel('Engine RPM')
+    ax.set_ylabel('Torque (Nm)')
+    ax.set_title('Engine Performance Contour Map')
+
+
+def plot_bsfc_map(grid, ax=None):
+    """
+    BSFC contour map of a ThermalGrid.
+    """
+    from matplotlib import pyplot as plt
+    levels = np.array([200, 220, 230, 240, 260, 280, 300, 350, 400, 500, 800, 1500])
+    plot_contours(ax or plt.gca(), grid, grid.bsfc, levels, 'Fuel Consumption Rate (g/kWh)')
+
+
+def plot_power_map(grid, ax=None):
+    """
+    Electric power contour map of an ElectricGrid.
+    """
+    from matplotlib import pyplot as plt
+    levels = np.array([-150, -100, -70, -50, -40, -30, -20, -10, 0, 10, 20, 30, 40, 50, 70, 100, 150])
+    plot_contours(ax or plt.gca(), grid, grid.power, levels, 'Power Output (kW)')
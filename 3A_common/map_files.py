@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Map_files lists the engine, motor and transmission maps given to the parametrization scripts (3A_gasoline, 3A_powertrain_elec, 3A_powertrain_drivetrain)."""
+
+import glob
+import os
+import pandas as pd
+
+
+# Inventory of a map folder, replaced by the maps it lists
+inventory = 'list_engine.csv'
+
+
+# First columns of the engine and motor maps
+map_header = ['RPM']
+
+
+def is_map(file_name, header=map_header):
+    """
+    Whether a CSV file has the layout of a map (semicolon columns, the first ones being header),
+    so that fitting summaries and catalogues written next to the maps are skipped.
+    """
+    with open(file_name, encoding='utf-8-sig', errors='replace') as file:
+        columns = [column.strip() for column in file.readline().split(';')]
+    return columns[:len(header)] == list(header)
+
+
+def engine_files(patterns, header=map_header):
+    """
+    List the maps given as files, directories (all the CSV files inside) or glob patterns.
+    A list_engine.csv inventory is replaced by the maps it lists (one identification per row);
+    the other files are kept only if they have the layout of a map (see is_map).
+
+    Parameters:
+    patterns (list): File names, directories, glob patterns or inventories.
+    header (list): First columns of the maps (default: engine and motor maps).
+
+    Returns:
+    list: Map files, without duplicates.
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, '*.csv')))
+        else:
+            matches = sorted(glob.glob(pattern))
+        for file_name in matches:
+            if os.path.basename(file_name) == inventory:
+                names = pd.read_csv(file_name, sep=';', encoding='utf-8-sig').iloc[:, 0]
+                files.extend(os.path.join(os.path.dirname(file_name), name + '.csv') for name in names)
+            elif is_map(file_name, header):
+                files.append(file_name)
+    return list(dict.fromkeys(files))
@@ -0,0 +1,44 @@
+"""Checks of the vectorized WOT boundary of engine_maps.py against the scalar calculate_wot_boundary of the notebooks."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from engine_maps import calculate_T_WOT, wot_boundary, wot_envelope, wot_interp
+from map_files import engine_files
+
+folder = os.path.dirname(os.path.abspath(__file__))
+maps = engine_files([os.path.join(folder, '..', '3A_gasoline'), os.path.join(folder, '..', '3A_powertrain_elec')])
+
+
+def calculate_wot_boundary(rpm_value, rpm_values, torque_wot_values):
+    """
+    Scalar WOT boundary of parametrization_gasoline_maps.ipynb and parametrization_elec_enginemaps.ipynb.
+    """
+    index = np.searchsorted(rpm_values, rpm_value)
+    if index == 0:
+        return torque_wot_values[0]
+    rpm_lower = rpm_values[index - 1]
+    rpm_upper = rpm_values[index]
+    torque_lower = torque_wot_values[index - 1]
+    torque_upper = torque_wot_values[index]
+    return torque_lower + (torque_upper - torque_lower) * (rpm_value - rpm_lower) / (rpm_upper - rpm_lower)
+
+
+@pytest.mark.parametrize('file_name', maps, ids=os.path.basename)
+def test_wot_against_notebook(file_name):
+    df = pd.read_csv(file_name, sep=';', encoding='utf-8-sig').dropna(subset=['RPM'])
+    rpm_values = df.iloc[:, 0].to_numpy(dtype=float)
+    torque_wot = calculate_T_WOT(rpm_values, df.iloc[:, 1].to_numpy(dtype=float))
+    rpm_range = np.arange(rpm_values[0], rpm_values[-1] + 1, 20)
+
+    # On the map points (repeated RPMs give the same non-finite values as the notebook)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = np.array([calculate_wot_boundary(rpm, rpm_values, torque_wot) for rpm in rpm_range])
+    np.testing.assert_allclose(wot_boundary(rpm_range, rpm_values, torque_wot), expected, rtol=1e-12)
+
+    # On the WOT envelope, as used by the map grids
+    rpm_envelope, torque_envelope = wot_envelope(rpm_values, torque_wot)
+    expected = np.array([calculate_wot_boundary(rpm, rpm_envelope, torque_envelope) for rpm in rpm_range])
+    np.testing.assert_allclose(wot_boundary(rpm_range, rpm_envelope, torque_envelope), expected, rtol=1e-12)
+    np.testing.assert_allclose(wot_interp(rpm_range, rpm_values, torque_wot), expected, rtol=1e-12)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Gasoline_fitting fits the engine parameters (n_i, fmep0, p0, Q0) of many gasoline engine maps in parallel and writes them as a thermal.csv catalogue."""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(folder, '..', '3A_common'))
+from engine_maps import calculate_T_WOT
+from map_files import engine_files
+
+
+# Version of the fitting, increased whenever the objective or its settings change (invalidates the cache)
+version = 1
+
+# Fit cache in the user cache directory (XDG_CACHE_HOME, ~/.cache by default), not in the source tree
+default_cache = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'petraul', 'fits_cache.json')
+
+# Rows of the thermal catalogue (3D_PETRAUL/thermal.csv)
+rows = ['Pmax [W]', 'ni', 'D [L]', 'fmep0 [kPa]', 'pmep0 [kPa.s2]', 'Q0 [kPa/s]', 'N_idle [rad/s]', 'cs [J/W/m]', 'stop_start []']
+
+# Columns of the fitting summary (results_thermal.csv)
+columns = ['max_eff', 'D', 'n_i', 'fmep0', 'p0', 'Q0', 'ecart']
+
+
+def load_engine_data(file_path):
+    """
+    Load gasoline engine data from a CSV file and filter out RPM <1000rpm and >4000rpm.
+
+    Parameters:
+    file_path (str): Path to the CSV file.
+
+    Returns:
+    tuple: Filtered arrays for RPM, torque, fuel_rate, consumption, efficiency, displacement and the maximum power of the map [W].
+    """
+    data = pd.read_csv(file_path, sep=';')
+
+    # Extract columns and assign meaningful variable names
+    rpm_values = data.iloc[:, 0].values
+    torque_values = data.iloc[:, 1].values
+    fuel_rate_values = data.iloc[:, 2].values
+    consumption_values = data.iloc[:, 3].values
+    efficiency_values = data.iloc[:, 4].values
+    displacement_value = data.iloc[0, 5]
+
+    # Maximum power over the whole map
+    max_power = np.max(rpm_values * np.pi / 30 * torque_values)
+
+    # Apply filtering criteria for valid RPM range (1000 < RPM < 4000)
+    valid = (rpm_values > 1000) & (rpm_values < 4000)
+
+    return rpm_values[valid], torque_values[valid], fuel_rate_values[valid], consumption_values[valid], efficiency_values[valid], displacement_value, max_power
+
+
+def fit_engine(file_name, prop=0.5):
+    """
+    Fit the engine parameters of a gasoline engine map (same objective as parametrization_gasoline_maps.ipynb).
+
+    Parameters:
+    file_name (str): Path to the engine map.
+    prop (float): Share of the WOT torque under which the map points are fitted.
+
+    Returns:
+    dict: Fitting summary (see columns) and maximum power 'Pmax' [W].
+    """
+    rpm, torque, fuel_rate, consumption, efficiency, displacement, max_power = load_engine_data(file_name)
+    torque_wot = calculate_T_WOT(rpm, torque)
+    max_efficiency = np.max(efficiency)
+
+    # Limit the torque under a percentage of WOT
+    valid = torque < torque_wot * prop
+    torque, rpm, consumption = torque[valid], rpm[valid], consumption[valid]
+    angular_velocity = rpm * 2 * np.pi / 60
+
+    # Objective: summed relative error of the BSFC, on scaled parameters
+    def objective_function(parameters):
+        n_i, fmep0, p0, Q0 = parameters
+        mep = (torque * angular_velocity) / (
+            (torque * angular_velocity) / n_i +
+            (100 * fmep0 * angular_velocity * displacement) / (4 * np.pi * n_i) +
+            (p0 / 1000) * (angular_velocity ** 3) * displacement / (4 * np.pi * n_i) +
+            (Q0 * displacement * 1000) / n_i
+        )
+        return np.sum(np.abs((consumption - (3600 / (mep * 43.5))) / consumption * 100))
+
+    initial_params = [max_efficiency / 100, 1.2, 1, 1]
+    parameter_bounds = [(max_efficiency / 100, 1), (0, 3), (0, 2), (0, 2)]
+    optimal_params = minimize(objective_function, initial_params, method='Powell', bounds=parameter_bounds).x
+    n_i, fmep0, p0, Q0 = optimal_params * [1, 100, 0.001, 1000]
+
+    # Mean error over the map points
+    mean_error = objective_function(optimal_params) / len(rpm)
+
+    values = [max_efficiency, displacement, n_i, fmep0, p0, Q0, mean_error]
+    result = {column: float(value) for column, value in zip(columns, values)}
+    result['Pmax'] = float(max_power)
+    return result
+
+
+def checksum(file_name, prop):
+    """
+    Cache key of a fit: hash of the map file and of the fitting settings.
+    """
+    with open(file_name, 'rb') as file:
+        digest = hashlib.sha1(file.read())
+    digest.update(f"{version}:{prop!r}".encode())
+    return digest.hexdigest()
+
+
+def load_cache(cache_file):
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file) as file:
+            return json.load(file)
+    return {}
+
+
+def save_cache(cache, cache_file):
+    if cache_file:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_file)), exist_ok=True)
+        with open(cache_file, 'w') as file:
+            json.dump(cache, file, indent=1, sort_keys=True)
+
+
+def fit_engines(files, prop=0.5, jobs=None, cache_file=default_cache):
+    """
+    Fit many engine maps in parallel, reusing the cached fits of unchanged maps.
+
+    Parameters:
+    files (list): Engine map files.
+    prop (float): Share of the WOT torque under which the map points are fitted.
+    jobs (int): Number of worker processes (default: number of CPUs).
+    cache_file (str): JSON file of the fits keyed by map hash (None: no cache).
+
+    Returns:
+    dict: Fitting results keyed by engine name (file name without extension), in the order of files.
+    """
+    cache = load_cache(cache_file)
+    keys = {file_name: checksum(file_name, prop) for file_name in files}
+    missing = [file_name for file_name in files if keys[file_name] not in cache]
+
+    if missing:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(fit_engine, file_name, prop) for file_name in missing]
+            for file_name, future in zip(missing, futures):
+                try:
+                    cache[keys[file_name]] = future.result()
+                except Exception as error:
+                    print(f"Skipped {file_name}: {error}", file=sys.stderr)
+        save_cache(cache, cache_file)
+
+    return {os.path.splitext(os.path.basename(file_name))[0]: cache[keys[file_name]] for file_name in files if keys[file_name] in cache}
+
+
+def thermal_catalogue(results, N_idle=670, cs=12.3, stop_start=0.3):
+    """
+    Thermal catalogue (3D_PETRAUL/thermal.csv layout: parameters as rows, engines as columns) from fitting results.
+
+    Parameters:
+    results (dict): Fitting results keyed by engine name (see fit_engines).
+    N_idle, cs, stop_start (float): Parameters of the catalogue not derived from the maps.
+
+    Returns:
+    DataFrame: Thermal catalogue.
+    """
+    table = pd.DataFrame({name: [result['Pmax'], result['n_i'], result['D'], result['fmep0'], result['p0'], result['Q0'], N_idle, cs, stop_start]
+                          for name, result in results.items()}, index=rows)
+    table.index.name = 'Thermal'
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('maps', nargs='*', default=[os.path.join(folder, 'list_engine.csv')],
+                        help='engine maps, directories, glob patterns or list_engine.csv inventories (default: the bundled inventory)')
+    parser.add_argument('-o', '--output', default='thermal.csv', help='thermal catalogue written (semicolon CSV, one column per engine)')
+    parser.add_argument('--summary', help='also write the fitting summary (results_thermal.csv layout)')
+    parser.add_argument('--prop', type=float, default=0.5, help='share of the WOT torque under which the map points are fitted')
+    parser.add_argument('--N_idle', type=float, default=670, help='idle engine speed written for every engine')
+    parser.add_argument('--cs', type=float, default=12.3, help='cold start parameter written for every engine')
+    parser.add_argument('--stop_start', type=float, default=0.3, help='stop and start parameter written for every engine')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--cache', default=default_cache, help='JSON cache of the fits keyed by map hash (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help='refit every map without reading or writing the cache')
+    args = parser.parse_args()
+
+    files = engine_files(args.maps)
+    if not files:
+        parser.error('no engine map found')
+
+    results = fit_engines(files, args.prop, args.jobs, None if args.no_cache else args.cache)
+    thermal_catalogue(results, args.N_idle, args.cs, args.stop_start).to_csv(args.output, sep=';', encoding='utf-8-sig', float_format='%.6g')
+    if args.summary:
+        pd.DataFrame([[result[column] for column in columns] for result in results.values()], index=list(results), columns=columns).to_csv(args.summary)
+    print(f"{len(results)} engines written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
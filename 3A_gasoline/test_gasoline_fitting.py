@@ -0,0 +1,46 @@
+"""Checks of the location and invalidation of the fit cache of gasoline_fitting.py."""
+
+import importlib
+import os
+import shutil
+import gasoline_fitting as gf
+
+folder = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_default_cache(tmp_path, monkeypatch):
+    try:
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg'))
+        assert importlib.reload(gf).default_cache == str(tmp_path / 'xdg' / 'petraul' / 'fits_cache.json')
+        monkeypatch.delenv('XDG_CACHE_HOME')
+        monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+        assert importlib.reload(gf).default_cache == str(tmp_path / 'home' / '.cache' / 'petraul' / 'fits_cache.json')
+        assert not gf.default_cache.startswith(folder)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(gf)
+
+
+def test_cache_invalidation(tmp_path, monkeypatch):
+    file_name = str(tmp_path / 'H1.5T2_GV.csv')
+    shutil.copy(os.path.join(folder, 'H1.5T2_GV.csv'), file_name)
+    cache_file = str(tmp_path / 'cache' / 'fits.json')
+
+    # Cached fits are returned without fitting the map again
+    key = gf.checksum(file_name, 0.5)
+    cached = dict.fromkeys(gf.columns + ['Pmax'], 1.0)
+    gf.save_cache({key: cached}, cache_file)
+    assert gf.fit_engines([file_name], cache_file=cache_file, jobs=1) == {'H1.5T2_GV': cached}
+
+    # Another share of the WOT torque, version or map content is fitted again
+    assert gf.checksum(file_name, 0.4) != key
+    monkeypatch.setattr(gf, 'version', gf.version + 1)
+    assert gf.checksum(file_name, 0.5) != key
+    monkeypatch.undo()
+    with open(file_name, 'a') as file:
+        file.write('\n')
+    assert gf.checksum(file_name, 0.5) != key
+
+    result = gf.fit_engines([file_name], cache_file=cache_file, jobs=1)['H1.5T2_GV']
+    assert result != cached and result == gf.fit_engine(file_name)
+    assert gf.load_cache(cache_file) == {key: cached, gf.checksum(file_name, 0.5): result}
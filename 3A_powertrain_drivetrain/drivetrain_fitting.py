@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Drivetrain_fitting fits the drivetrain parameters (n_tr, a) of many transmission efficiency maps concurrently, with bootstrap confidence intervals.
+The maps are fitted in parallel processes; each fit is vectorized over the original points and its bootstrap resamples.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(folder, '..', '3A_common'))
+from map_files import engine_files
+
+
+# Columns of the fitting report (aP_max: fitted a*P_max [J], a: scaled by P_max [s] as in the catalogues)
+columns = ['Type', 'P_max', 'n_tr', 'aP_max', 'a', 'mean_error', 'n_tr_low', 'n_tr_high', 'a_low', 'a_high']
+
+# Upper bound of a*P_max [J] (as in drivetrain_test.ipynb)
+a_max = 10
+
+# First columns of the transmission maps
+header = ['Type', 'Gear', 'transg', 'RPM_e', 'Torque_e', 'Efficiency']
+
+
+def load_engine_file(file_name):
+    """
+    Load engine and drivetrain data from a CSV file and filter out invalid efficiency values.
+
+    Parameters:
+    file_name (str): Path to the CSV file.
+
+    Returns:
+    tuple: Extracted and filtered drivetrain data.
+    """
+    df = pd.read_csv(file_name, sep=';')
+
+    # Extract data from the file
+    drivetrain = df.iloc[0, 0]
+    gears = df.iloc[:, 1].values
+    transmission_ratios = df.iloc[:, 2].values
+    rpm_values = df.iloc[:, 3].values
+    torque_values = df.iloc[:, 4].values
+    efficiency_values = df.iloc[:, 5].values
+    transfer_ratio = df.iloc[0, 6]
+    max_power = df.iloc[0, 7]
+
+    # Filter out rows with efficiency less than or equal to 10
+    valid = efficiency_values > 10
+
+    return drivetrain, gears[valid], transmission_ratios[valid], rpm_values[valid], torque_values[valid], efficiency_values[valid], transfer_ratio, max_power
+
+
+def weighted_median(values, weights):
+    """
+    Weighted median along the last axis.
+
+    Parameters:
+    values (array): Values, shape (..., n).
+    weights (array): Non-negative weights, broadcastable with values.
+
+    Returns:
+    array: Weighted medians, shape (...).
+    """
+    values, weights = np.broadcast_arrays(values, weights)
+    order = np.argsort(values, axis=-1)
+    values = np.take_along_axis(values, order, axis=-1)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis=-1), axis=-1)
+    index = np.argmax(cumulative >= cumulative[..., -1:] / 2, axis=-1)
+    return np.take_along_axis(values, index[..., None], axis=-1)[..., 0]
+
+
+def best_fit(a, power, N, eff, weights, n_tr_min):
+    """
+    Best n_tr for each candidate a, and the corresponding summed absolute error of the efficiency.
+    The efficiency model is n_tr*f(a) with f(a) = 100*Tt*Nt/(Tt*Nt + a*N): for a given a, the summed absolute error
+    is minimal for the weighted median of eff/f(a), weighted by f(a).
+
+    Parameters:
+    a (array): Candidate values of a*P_max [J], shape (..., G).
+    power (array): Transmission output power Tt*Nt of the map points [W].
+    N (array): Engine speed of the map points [rad/s].
+    eff (array): Efficiency of the map points [%].
+    weights (array): Weights of the map points (bootstrap counts), shape (..., 1, n).
+    n_tr_min (float): Lower bound of n_tr.
+
+    Returns:
+    tuple: n_tr and summed absolute error, shape (..., G).
+    """
+    f = 100 * power / (power + a[..., None] * N)
+    n_tr = np.clip(weighted_median(eff / f, weights * f), n_tr_min, 1)
+    error = np.sum(weights * np.abs(eff - n_tr[..., None] * f), axis=-1)
+    return n_tr, error
+
+
+def fit_weights(power, N, eff, weights, n_tr_min, grid=41, refinements=4):
+    """
+    Fit (n_tr, a) for every set of weights at once: search of a on a grid over [0, a_max], refined around the best value.
+
+    Parameters:
+    power, N, eff (array): Map points (see best_fit).
+    weights (array): Weights of the map points, shape (R, n) (one fit per row).
+    n_tr_min (float): Lower bound of n_tr.
+    grid (int): Number of candidate values of a per search.
+    refinements (int): Number of refinements of the grid.
+
+    Returns:
+    tuple: n_tr and a*P_max, shape (R,).
+    """
+    weights = weights[:, None, :]
+    a = np.broadcast_to(np.linspace(0, a_max, grid), (len(weights), grid))
+    width = a_max / (grid - 1)
+    for level in range(refinements + 1):
+        n_tr, error = best_fit(a, power, N, eff, weights, n_tr_min)
+        best = np.argmin(error, axis=-1)
+        a_best = a[np.arange(len(a)), best]
+        n_tr_best = n_tr[np.arange(len(a)), best]
+        a = np.clip(a_best[:, None] + np.linspace(-width, width, grid), 0, a_max)
+        width = 2 * width / (grid - 1)
+    return n_tr_best, a_best
+
+
+def fit_drivetrain(file_name, bootstrap=200, confidence=0.95, seed=0):
+    """
+    Fit the drivetrain parameters of a transmission efficiency map (same objective as drivetrain_test.ipynb),
+    with bootstrap confidence intervals (map points resampled with replacement).
+
+    Parameters:
+    file_name (str): Path to the transmission map.
+    bootstrap (int): Number of bootstrap resamples (0: no intervals).
+    confidence (float): Confidence level of the intervals.
+    seed (int): Seed of the resampling.
+
+    Returns:
+    dict: Fitting report (see columns).
+    """
+    drivetrain, gears, transg, rpm, torque, eff, transf, P_max = load_engine_file(file_name)
+
+    # Transmission speed and torque
+    rpm_trans = rpm / (transg * transf)
+    torque_trans = rpm * torque * eff / (100 * rpm_trans)
+    N = rpm * 2 * np.pi / 60
+    power = torque_trans * rpm_trans * 2 * np.pi / 60
+
+    # Original fit first, then the bootstrap resamples as counts of each point
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(len(eff), np.full(len(eff), 1 / len(eff)), size=bootstrap)
+    weights = np.vstack((np.ones(len(eff)), counts))
+    n_tr, a = fit_weights(power, N, eff, weights, np.max(eff) / 100)
+
+    # Mean relative error of the original fit
+    eff_model = n_tr[0] * 100 * power / (power + a[0] * N)
+    mean_error = np.mean(np.abs((eff - eff_model) / eff * 100))
+
+    tail = (1 - confidence) / 2 * 100
+    n_tr_low, n_tr_high = np.percentile(n_tr[1:], [tail, 100 - tail]) if bootstrap else (np.nan, np.nan)
+    a_low, a_high = np.percentile(a[1:] / P_max, [tail, 100 - tail]) if bootstrap else (np.nan, np.nan)
+
+    values = [drivetrain, float(P_max), n_tr[0], a[0], a[0] / P_max, mean_error, n_tr_low, n_tr_high, a_low, a_high]
+    return {column: value if column == 'Type' else float(value) for column, value in zip(columns, values)}
+
+
+def fit_drivetrains(files, bootstrap=200, confidence=0.95, jobs=None):
+    """
+    Fit many transmission maps concurrently.
+
+    Parameters:
+    files (list): Transmission map files.
+    bootstrap (int): Number of bootstrap resamples per map.
+    confidence (float): Confidence level of the intervals.
+    jobs (int): Number of worker processes (default: number of CPUs).
+
+    Returns:
+    DataFrame: Fitting report, one row per map (see columns).
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(fit_drivetrain, file_name, bootstrap, confidence) for file_name in files]
+        for file_name, future in zip(files, futures):
+            try:
+                results[os.path.splitext(os.path.basename(file_name))[0]] = future.result()
+            except Exception as error:
+                print(f"Skipped {file_name}: {error}", file=sys.stderr)
+    return pd.DataFrame.from_dict(results, orient='index', columns=columns)
+
+
+def transmission_catalogue(report, layout='transmission', S=60, Ne=1750):
+    """
+    Transmission catalogue from a fitting report, in the layout of 3D_PETRAUL/transmission.csv (ntr, a_tr, S, Ne)
+    or 3D_PETRAUL/trans_EV.csv (a, n_tr), one column per map.
+
+    Parameters:
+    report (DataFrame): Fitting report (see fit_drivetrains).
+    layout (str): 'transmission' or 'trans_EV'.
+    S, Ne (float): Parameters of the transmission catalogue not derived from the maps.
+
+    Returns:
+    DataFrame: Transmission catalogue.
+    """
+    if layout == 'trans_EV':
+        table = pd.DataFrame([report['a'], report['n_tr']], index=['a', 'n_tr'])
+        table.index.name = 'Name'
+    else:
+        table = pd.DataFrame([report['n_tr'], report['a'], pd.Series(S, report.index), pd.Series(Ne, report.index)],
+                             index=['ntr', 'a_tr', 'S', 'Ne [rpm]'])
+        table.index.name = 'Transmission'
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('maps', nargs='*', default=[folder],
+                        help='transmission maps, directories or glob patterns (default: the bundled maps)')
+    parser.add_argument('-o', '--output', default='transmission.csv', help='transmission catalogue written (semicolon CSV, one column per map)')
+    parser.add_argument('--layout', choices=['transmission', 'trans_EV'], default='transmission', help='layout of the catalogue written')
+    parser.add_argument('--report', help='also write the fitting report with the confidence intervals (CSV)')
+    parser.add_argument('--bootstrap', type=int, default=200, help='number of bootstrap resamples per map')
+    parser.add_argument('--confidence', type=float, default=0.95, help='confidence level of the intervals')
+    parser.add_argument('--S', type=float, default=60, help='synchronization parameter written for every map (transmission layout)')
+    parser.add_argument('--Ne', type=float, default=1750, help='engine speed in town written for every map (transmission layout)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: number of CPUs)')
+    args = parser.parse_args()
+
+    files = engine_files(args.maps, header)
+    if not files:
+        parser.error('no transmission map found')
+
+    report = fit_drivetrains(files, args.bootstrap, args.confidence, args.jobs)
+    transmission_catalogue(report, args.layout, args.S, args.Ne).to_csv(args.output, sep=';', encoding='utf-8-sig', float_format='%.6g')
+    if args.report:
+        report.to_csv(args.report)
+
+    with pd.option_context('display.float_format', '{:.4g}'.format, 'display.width', 200, 'display.max_columns', None):
+        print(report[['Type', 'n_tr', 'n_tr_low', 'n_tr_high', 'a', 'a_low', 'a_high', 'mean_error']])
+    print(f"{len(report)} maps written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
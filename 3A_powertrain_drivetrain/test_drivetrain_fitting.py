@@ -0,0 +1,51 @@
+"""Checks of the drivetrain fit of drivetrain_fitting.py against the Powell fit of drivetrain_test.ipynb."""
+
+import os
+import shutil
+import numpy as np
+import pytest
+import drivetrain_fitting as df
+from map_files import engine_files
+
+folder = os.path.dirname(os.path.abspath(__file__))
+
+
+def objective(file_name, n_tr, a):
+    """
+    Summed absolute error of the efficiency minimized in drivetrain_test.ipynb.
+    """
+    drivetrain, gears, transg, rpm, torque, eff, transf, P_max = df.load_engine_file(file_name)
+    rpm_trans = rpm / (transg * transf)
+    Tt = rpm * torque * eff / (100 * rpm_trans)
+    N = rpm * 2 * np.pi / 60
+    Nt = rpm_trans * 2 * np.pi / 60
+    return np.sum(np.abs(eff - Tt * Nt / (Tt * Nt / n_tr + a * N / n_tr) * 100))
+
+
+# Powell fit of the notebook: n_tr, a*P_max [J] and objective
+powell = {
+    'Toyota': (0.972064, 4.471937, 489.7648),
+    'Chrysler': (0.975950, 4.319451, 576.8171),
+    'Malibu': (0.958917, 6.694016, 900.3094),
+}
+
+
+@pytest.mark.parametrize('name', sorted(powell))
+def test_fit_against_powell(name):
+    file_name = os.path.join(folder, name + '.csv')
+    report = df.fit_drivetrain(file_name, bootstrap=20)
+    n_tr, a, expected = powell[name]
+    value = objective(file_name, report['n_tr'], report['aP_max'])
+    assert expected - 0.1 < value <= expected + 1e-3
+    assert report['n_tr'] == pytest.approx(n_tr, abs=1e-3)
+    assert report['aP_max'] == pytest.approx(a, abs=0.05)
+    assert report['n_tr_low'] <= report['n_tr_high'] and report['a_low'] <= report['a_high']
+
+
+def test_map_files(tmp_path):
+    # Catalogues and reports written next to the maps are not taken as maps
+    shutil.copy(os.path.join(folder, 'Toyota.csv'), tmp_path)
+    report = df.fit_drivetrains([str(tmp_path / 'Toyota.csv')], bootstrap=0, jobs=1)
+    df.transmission_catalogue(report).to_csv(tmp_path / 'transmission.csv', sep=';', encoding='utf-8-sig')
+    report.to_csv(tmp_path / 'report.csv')
+    assert engine_files([str(tmp_path)], df.header) == [str(tmp_path / 'Toyota.csv')]
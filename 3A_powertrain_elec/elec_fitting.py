@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Elec_fitting fits the motor parameters (n_i, alpha, epsilon, betha) of many electric motor maps in parallel and writes them as an electric.csv catalogue."""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.optimize import linprog, minimize_scalar
+
+folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(folder, '..', '3A_common'))
+from map_files import engine_files
+
+
+# Rows of the electric catalogue (3D_PETRAUL/electric.csv)
+rows = ['Pmax [W]', 'Tmax [N.m]', 'n_i []', 'alpha [J]', 'epsilon [1/(N.m.s)]', 'betha [W]']
+
+# Columns of the fitting summary (elec_results.csv)
+columns = ['max_eff', 'Pmax', 'n_i', 'alpha', 'epsilon', 'betha', 'ecart']
+
+
+def load_engine_data(file_name):
+    """
+    Load engine data from a CSV file and filter out non-positive RPM and torque values.
+
+    Parameters:
+    file_name (str): Path to the CSV file.
+
+    Returns:
+    tuple: Filtered arrays for RPM, torque, power (P), and efficiency.
+    """
+    df = pd.read_csv(file_name, sep=';')
+    rpm_values, torque_values, power_values, efficiency_values = (df.iloc[:, k].values for k in range(4))
+
+    # Filter out entries with non-positive RPM or torque
+    valid = (rpm_values > 0) & (torque_values > 0)
+    return rpm_values[valid], torque_values[valid], power_values[valid], efficiency_values[valid]
+
+
+def loss_solve(n_i, torque, angular_velocity, power):
+    """
+    Losses (alpha, epsilon, betha) minimizing the absolute relative error of the power for a given n_i.
+    Once n_i is fixed the power model is linear in the losses: the least absolute deviations are solved exactly
+    as a linear program (error split into positive and negative parts).
+
+    Parameters:
+    n_i (float): Motor efficiency.
+    torque, angular_velocity (array): Operating points of the map [N.m, rad/s].
+    power (array): Electric power of the map [W].
+
+    Returns:
+    tuple: Losses (alpha, epsilon, betha) and relative errors of the power model [%].
+    """
+    # n_i*P - T*w = alpha*w + epsilon*T^2 + betha, each row divided by n_i*P (relative error)
+    scale = n_i * power
+    A = np.column_stack((angular_velocity, torque ** 2, np.ones_like(torque))) / scale[:, None]
+    b = 1 - torque * angular_velocity / scale
+
+    # Minimize sum(u + v) with A*losses + u - v = b and losses, u, v >= 0
+    n = len(b)
+    cost = np.concatenate((np.zeros(3), np.ones(2 * n)))
+    result = linprog(cost, A_eq=np.hstack((A, np.eye(n), -np.eye(n))), b_eq=b, bounds=(0, None), method='highs')
+    if not result.success:
+        raise ValueError(f"Loss fit failed for n_i={n_i:g}: {result.message}")
+    losses = result.x[:3]
+    return losses, (b - A @ losses) * 100
+
+
+def fit_motor(file_name):
+    """
+    Fit the motor parameters of an electric motor map: 1-D search of n_i in [max_eff, 1] on the mean absolute relative
+    error of parametrization_elec_enginemaps.ipynb, the losses being solved exactly for each n_i (see loss_solve).
+    The inner solve is a linear program solved to its global optimum whatever its starting point, so no warm start of the losses
+    from the previous n_i is needed.
+
+    Parameters:
+    file_name (str): Path to the motor map.
+
+    Returns:
+    dict: Fitting summary (see columns) and maximum torque 'Tmax' [N.m].
+    """
+    rpm, torque, power_values, efficiency = load_engine_data(file_name)
+    angular_velocity = rpm * 2 * np.pi / 60
+    power = power_values * 1000
+    max_efficiency = np.max(efficiency)
+
+    def mean_error(n_i):
+        return np.mean(np.abs(loss_solve(n_i, torque, angular_velocity, power)[1]))
+
+    n_i = minimize_scalar(mean_error, bounds=(max_efficiency / 100, 1), method='bounded', options={'xatol': 1e-6}).x
+    (alpha, epsilon, betha), error = loss_solve(n_i, torque, angular_velocity, power)
+
+    values = [max_efficiency, np.max(power), n_i, alpha, epsilon, betha, np.mean(np.abs(error))]
+    result = {column: float(value) for column, value in zip(columns, values)}
+    result['Tmax'] = float(np.max(torque))
+    return result
+
+
+def fit_motors(files, jobs=None):
+    """
+    Fit many motor maps in parallel.
+
+    Parameters:
+    files (list): Motor map files.
+    jobs (int): Number of worker processes (default: number of CPUs).
+
+    Returns:
+    dict: Fitting results keyed by motor name (file name without extension), in the order of files.
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(fit_motor, file_name) for file_name in files]
+        for file_name, future in zip(files, futures):
+            try:
+                results[os.path.splitext(os.path.basename(file_name))[0]] = future.result()
+            except Exception as error:
+                print(f"Skipped {file_name}: {error}", file=sys.stderr)
+    return results
+
+
+def electric_catalogue(results):
+    """
+    Electric catalogue (3D_PETRAUL/electric.csv layout: parameters as rows, motors as columns) from fitting results.
+    """
+    return pd.DataFrame({name: [result['Pmax'], result['Tmax'], result['n_i'], result['alpha'], result['epsilon'], result['betha']]
+                         for name, result in results.items()}, index=rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('maps', nargs='*', default=[os.path.join(folder, 'list_engine.csv')],
+                        help='motor maps, directories, glob patterns or list_engine.csv inventories (default: the bundled inventory)')
+    parser.add_argument('-o', '--output', default='electric.csv', help='electric catalogue written (semicolon CSV, one column per motor)')
+    parser.add_argument('--summary', help='also write the fitting summary (elec_results.csv layout)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: number of CPUs)')
+    args = parser.parse_args()
+
+    files = engine_files(args.maps)
+    if not files:
+        parser.error('no motor map found')
+
+    results = fit_motors(files, args.jobs)
+    electric_catalogue(results).to_csv(args.output, sep=';', encoding='utf-8-sig', float_format='%.6g')
+    if args.summary:
+        pd.DataFrame([[result[column] for column in columns] for result in results.values()], index=list(results), columns=columns).to_csv(args.summary)
+    print(f"{len(results)} motors written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+"""Checks of the motor fit of elec_fitting.py against the results of parametrization_elec_enginemaps.ipynb (elec_results.csv)."""
+
+import os
+import pandas as pd
+import pytest
+import elec_fitting
+
+folder = os.path.dirname(os.path.abspath(__file__))
+notebook = pd.read_csv(os.path.join(folder, 'elec_results.csv'), index_col=0)
+
+# Mean absolute relative errors [%] of the exact inner solve, at most 0.7% below those of the notebook
+errors = {'C150_EV': 1.15362, 'T60_EV': 1.09427, 'H30_EV': 0.99252, 'H8.5_EV': 1.38666, 'I150_EV': 1.45423}
+
+
+@pytest.mark.parametrize('name', sorted(errors))
+def test_fit_against_notebook(name):
+    result = elec_fitting.fit_motor(os.path.join(folder, name + '.csv'))
+    assert result['ecart'] == pytest.approx(errors[name], abs=1e-4)
+    assert result['ecart'] <= notebook.loc[name, 'ecart']
+    assert result['max_eff'] == notebook.loc[name, 'max_eff']
+    assert result['Pmax'] == pytest.approx(notebook.loc[name, 'Pmax'])
+    assert result['n_i'] == pytest.approx(notebook.loc[name, 'n_i'], abs=0.01)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Benchmark of the vectorized cycle preparation (t_to_d, cycle_path) against the former loop implementations on long traces."""
+
+import argparse
+import time
+import numpy as np
+import cycle_preparation as cp
+
+
+def t_to_d_loop(cycle):
+    """
+    Former loop implementation of cycle_preparation.t_to_d (reference).
+    """
+    distance = 0
+    distances = [0]
+    for k in range(1, len(cycle)):
+        v0 = cycle[k - 1]
+        v1 = cycle[k]
+        distance += (v1 + v0) / 2
+        distances.append(distance)
+    return np.array(distances)
+
+
+def cycle_path_loop(extrema_list):
+    """
+    Former loop implementation of cycle_preparation.cycle_path (reference).
+    """
+    values = np.array(extrema_list[0])
+    positions = np.array(extrema_list[1], dtype=int)
+    next_values = np.roll(values, -1)
+    next_positions = np.roll(positions, -1)
+    cycle_values = np.maximum(values, next_values)
+    segment_lengths = next_positions - positions - 1
+    cycle = []
+    for k in range(len(values) - 1):
+        cycle.append(values[k])
+        cycle.extend([cycle_values[k]] * segment_lengths[k])
+    cycle.append(values[-1])
+    return np.array(cycle)
+
+
+def long_trace(file_name, n):
+    """
+    Build a long 1 Hz speed trace by repeating a driving cycle with random noise, as a stand-in for telematics logs.
+
+    Parameters:
+    file_name (str): Driving cycle file (see cycle_preparation.cycle_opening).
+    n (int): Number of samples.
+
+    Returns:
+    list: Speed values (m/s).
+    """
+    cycle = np.array(cp.cycle_opening(file_name))
+    trace = np.resize(cycle, n)
+    noise = np.random.default_rng(0).normal(0, 0.05, n)
+    return list(np.where(trace > 0, np.maximum(trace + noise, 0), 0))
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cycle', default='wltp.csv', help='driving cycle repeated to build the trace')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**5, 10**6, 5 * 10**6], help='number of samples of the traces')
+    args = parser.parse_args()
+
+    print(f"{'function':<12}{'samples':>12}{'loop [s]':>12}{'numpy [s]':>12}{'speed-up':>10}  identical")
+    for n in args.sizes:
+        trace = long_trace(args.cycle, n)
+
+        reference, loop_time = timed(t_to_d_loop, trace)
+        result, numpy_time = timed(cp.t_to_d, trace)
+        print(f"{'t_to_d':<12}{n:>12}{loop_time:>12.3f}{numpy_time:>12.3f}{loop_time / numpy_time:>10.0f}  {np.array_equal(reference, result)}")
+
+        ext = cp.extrema(trace)
+        reference, loop_time = timed(cycle_path_loop, ext)
+        result, numpy_time = timed(cp.cycle_path, ext)
+        print(f"{'cycle_path':<12}{n:>12}{loop_time:>12.3f}{numpy_time:>12.3f}{loop_time / numpy_time:>10.0f}  {np.array_equal(reference, result)}")
+
+
+if __name__ == '__main__':
+    main()
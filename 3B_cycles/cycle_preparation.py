@@ -7,7 +7,6 @@
 from pylab import *
 import csv
 import numpy as np
-from scipy.signal import argrelextrema
 
 
 # In[2]:
@@ -51,18 +50,14 @@ def t_to_d(cycle):
     Returns:
     array: Cumulative distance at each time step.
     """
-    # Initialize distance array
-    distance = 0
-    distances = [0]
+    cycle = np.asarray(cycle, dtype=float)
 
-    # Calculate cumulative distance using trapezoidal integration
-    for k in range(1, len(cycle)):
-        v0 = cycle[k - 1]
-        v1 = cycle[k]
-        distance += (v1 + v0) / 2  # Trapezoidal area
-        distances.append(distance)
+    # Cumulative trapezoidal integration (1 s time step), accumulated in order as the step-by-step sum
+    distances = np.empty(max(len(cycle), 1))
+    distances[0] = 0
+    np.cumsum((cycle[1:] + cycle[:-1]) / 2, out=distances[1:])
 
-    return np.array(distances)
+    return distances
 
 
 # In[4]:
@@ -80,30 +75,20 @@ def extrema_standard(lst):
         - extrema_list (array): Array of extrema values.
         - indice_list (array): Array of indices corresponding to the extrema.
     """
-    arr = np.array(lst)
-
-    # Find indices of local maxima and minima
-    maxima_indices = argrelextrema(arr, np.greater)[0]
-    minima_indices = argrelextrema(arr, np.less)[0]
+    arr = np.asarray(lst)
 
-    # Identify constant regions by comparing differences between consecutive values
-    diff_arr = np.diff(arr)
-    constant_start_indices = np.where(diff_arr[1:] == 0)[0]
-    constant_end_indices=np.where(diff_arr[:-1] == 0)[0]
+    # Sign of the slope between consecutive values (-1, 0 or 1)
+    slope = np.sign(np.diff(arr))
 
-    # Filter the constant regions to get only unique start and end points
-    unique_1 = np.setdiff1d(constant_start_indices, constant_end_indices)
-    unique_2 = np.setdiff1d(constant_end_indices, constant_start_indices)
+    # Local maxima and minima and the first and last points of constant regions are exactly
+    # the points where the slope changes sign, in one linear pass
+    turning_indices = np.flatnonzero(slope[1:] != slope[:-1]) + 1
 
+    # Include boundary points (0 and len(arr) - 1) as extrema
+    indice_list = np.concatenate(([0], turning_indices, [len(arr) - 1]))
 
-
-    # Combine all indices (maxima, minima, constant regions, boundaries) and include boundary points (0 and len(arr) - 1) as extrema
-    indice_list = np.concatenate(([0,len(arr)-1],maxima_indices,minima_indices,unique_1+1, unique_2+1))
-    indice_list.sort()
-    
     # Extract the extrema values corresponding to the indices
-    extrema_list = np.array([(arr[i]) for i in indice_list])
-    
+    extrema_list = arr[indice_list]
 
     return extrema_list, indice_list
 
@@ -126,95 +111,126 @@ def extrema_smooth(lst, limit):
         - indice_list (array): List of indices corresponding to the smoothed extrema.
     """
     arr = np.array(lst)
-    list_D=np.array(t_to_d(lst))
+    list_D = t_to_d(lst)
 
-    # Find indices of local maxima and minima
-    maxima_indices = argrelextrema(arr, np.greater)[0]
-    minima_indices = argrelextrema(arr, np.less)[0]
+    # Find indices of local maxima, minima and constant regions
+    extrema_list, indice_list = extrema_standard(arr)
 
-    # Identify constant regions by comparing differences between consecutive values
-    diff_arr = np.diff(arr)
-    constant_start_indices = np.where(diff_arr[1:] == 0)[0]
-    constant_end_indices=np.where(diff_arr[:-1] == 0)[0]
+    return smooth(arr, list_D, extrema_list, indice_list, limit)
 
-    # Filter the constant regions to get only unique start and end points
-    unique_1 = np.setdiff1d(constant_start_indices, constant_end_indices)
-    unique_2 = np.setdiff1d(constant_end_indices, constant_start_indices)
 
+def region_means(arr, starts, stops):
+    """
+    Mean values of several regions of an array in one pass (np.add.reduceat over the region bounds).
 
+    Parameters:
+    arr (array): Values.
+    starts (array): First index of each region.
+    stops (array): Index following the last one of each region (regions with stop <= start give arr[start]).
 
-    # Combine all indices (maxima, minima, constant regions, boundaries) and include boundary points (0 and len(arr) - 1) as extrema
-    indice_list = np.concatenate(([0,len(arr)-1],maxima_indices,minima_indices,unique_1+1, unique_2+1))
-    indice_list.sort()
-    
-    # Extract the extrema values corresponding to the indices
-    extrema_list = np.array([(arr[i]) for i in indice_list])
+    Returns:
+    array: Mean value of arr[starts[k]:stops[k]] for each region k.
+    """
+    if len(starts) == 0:
+        return np.zeros(0)
+    bounds = np.column_stack((starts, stops)).ravel()
+    sums = np.add.reduceat(arr[:bounds.max() + 1], bounds)[::2]
+    return sums / np.maximum(stops - starts, 1)
+
+
+def smooth(arr, list_D, values, indice_list, limit):
+    """
+    Apply the smoothing rules to extrema points: neglect low braking forces and gear changes during acceleration phases.
+
+    Parameters:
+    arr (array): Values (e.g., speed values); any array supporting slicing, such as a memory-mapped trace.
+    list_D (array): Cumulative distance at each time step (see t_to_d).
+    values (array): Extrema values (see extrema_standard), modified in place.
+    indice_list (array): Indices of the extrema.
+    limit (float): Threshold for neglecting low braking forces.
+
+    Returns:
+    tuple:
+        - values (array): Smoothed list of extrema values.
+        - indice_list (array): List of indices corresponding to the smoothed extrema.
+    """
     list_incident_D = list_D[indice_list]
 
-    
-   # Rule 1: Neglect low braking forces
-    values = extrema_list
+    # Rule 1: Neglect low braking forces
     diff_pos = np.diff(list_incident_D)
-    values_2 = values ** 2 / 2
-    values_2_pos = np.diff(values_2)
-
-    force = values_2_pos / diff_pos
-    incident_pos = np.where(np.diff(values) < 0)[0]
-    braking_distance = diff_pos[incident_pos]
-    braking_force = -values_2_pos[values_2_pos < 0] / braking_distance
-
-    indices_to_smooth = np.where((force < 0) & (force > -limit))[0]
-
-    indices_to_erase = []
-    for i in indices_to_smooth:
-        j = 1
-
-        # Check if values are constant and smooth the region
-        if values[i + 1] == values[i + 2]:
-            indices_to_erase.append(i + 1)
-            j += 1
-        if (values[i] > values[i + j + 1]) and (values[i + 1] < values[i + j + 1]):
-            indices_to_erase.append(i + j)
-            j += 1
-
-        # Smooth the values in the region
-        mean_value = np.mean(arr[indice_list[i]:indice_list[i + j]])
-        if values[i] == values[i - 1]:
-            values[i - 1] = mean_value
-        values[i] = mean_value
-        values[i + j] = mean_value
+    values_2_pos = np.diff(values ** 2 / 2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        force = values_2_pos / diff_pos
+    i = np.where((force < 0) & (force > -limit))[0]
+
+    # Extrema following each braking region (NaN beyond the last extremum, so that the checks fail at the edge)
+    padded = np.concatenate((values, [np.nan] * 3))
+    previous = np.concatenate((i[:1], i[:-1]))
+
+    # Check if values are constant after the braking and if they then recover below the value before the braking.
+    # The value before the braking is either the extremum or, when the previous region ends on it, the mean of that region
+    constant = padded[i + 1] == padded[i + 2]
+    j = 1 + constant
+    following = padded[i + j + 1]
+    rising = padded[i + 1] < following
+    mean_before = region_means(arr, indice_list[previous], indice_list[i])
+    stop_original = i + j + ((values[i] > following) & rising)
+    stop_smoothed = i + j + ((mean_before > following) & rising)
+
+    # Whether each region starts on the end of the previous one: smoothed[k] = (stop of region k-1 == i[k]), the stop of
+    # region k-1 depending on smoothed[k-1]. if_original/if_smoothed hold smoothed[k] given that region k-1 starts on
+    # an original/smoothed value. Where both agree the chain restarts from a known value; in between, smoothed[k] either
+    # follows or inverts smoothed[k-1], so one running pass over the last restart and the count of inversions resolves it
+    if_original = np.concatenate(([False], stop_original[:-1] == i[1:]))
+    if_smoothed = np.concatenate(([False], stop_smoothed[:-1] == i[1:]))
+    restart = np.maximum.accumulate(np.where(if_original == if_smoothed, np.arange(len(i)), 0))
+    inversions = np.cumsum(if_original & ~if_smoothed)
+    smoothed = if_original[restart] ^ ((inversions - inversions[restart]) % 2 == 1)
+
+    current = np.where(smoothed, mean_before, values[i])
+    stop = np.where(smoothed, stop_smoothed, stop_original)
+    indices_to_erase = np.concatenate((i[constant] + 1, (i + j)[stop > i + j]))
+    mean_values = region_means(arr, indice_list[i], indice_list[stop])
+
+    # A constant region before the braking is smoothed as well
+    previous_stop = np.concatenate(([-1], stop[:-1]))
+    previous_mean = np.concatenate(([np.nan], mean_values[:-1]))
+    value_before = np.where(previous_stop == i - 1, previous_mean, values[i - 1])
+    before = np.where((i > 0) & (current == value_before), i - 1, -1)
+
+    # Smooth the values in the regions, later regions overwriting earlier ones
+    targets = np.column_stack((before, i, stop)).ravel()
+    means = np.repeat(mean_values, 3)
+    values[targets[targets >= 0]] = means[targets >= 0]
 
     # Remove smoothed indices
     values = np.delete(values, indices_to_erase)
     indice_list = np.delete(indice_list, indices_to_erase)
 
-    
+
     # Rule 2: Detect gear changes during acceleration phases
-   
-    extrema_duration=np.diff(indice_list)
-    diff_values=np.diff(values)
-    
+
+    extrema_duration = np.diff(indice_list)
+    diff_values = np.diff(values)
+
     # Identify short incidents lasting 1-2 seconds
     incident_pos = np.where(diff_values < 0)[0]
-    short_incident=incident_pos[np.where((extrema_duration[incident_pos]<=2))[0]]
-    
-    # Detect gear change patterns
-    gear_change=incident_pos[np.where((diff_values[short_incident-1]>0) & (extrema_duration[short_incident-1]>3) & (diff_values[short_incident+1]>0) & (extrema_duration[short_incident+1]>3))[0]]
-    
-    # Remove gear change-related extrema
-    indice_to_erase=[gear_change,gear_change+1]
+    short_incident = incident_pos[np.where((extrema_duration[incident_pos] <= 2))[0]]
 
-    values=np.delete(values,indice_to_erase)
-    indice_list=np.delete(indice_list,indice_to_erase)
+    # Detect gear change patterns (between two acceleration phases longer than 3 seconds, none after the last incident)
+    next_values = np.append(diff_values, 0)[short_incident + 1]
+    next_duration = np.append(extrema_duration, 0)[short_incident + 1]
+    gear_change = incident_pos[np.where((diff_values[short_incident - 1] > 0) & (extrema_duration[short_incident - 1] > 3) &
+                                        (next_values > 0) & (next_duration > 3))[0]]
 
-    return values,indice_list
+    # Remove gear change-related extrema
+    indice_to_erase = np.concatenate((gear_change, gear_change + 1))
 
+    values = np.delete(values, indice_to_erase)
+    indice_list = np.delete(indice_list, indice_to_erase)
 
-        
-    
-    
-    
-    
+    return values, indice_list
 
 
 # In[6]:
@@ -267,15 +283,12 @@ def cycle_path(extrema_list):
     cycle_values = np.maximum(values, next_values)
     segment_lengths = next_positions - positions - 1
 
-    # Reconstruct the cycle path
-    cycle = []
-    for k in range(len(values) - 1):
-        cycle.append(values[k])
-        cycle.extend([cycle_values[k]] * segment_lengths[k])
-    
-    cycle.append(values[-1])
-    
-    return np.array(cycle)
+    # Reconstruct the cycle path: each extremum followed by its segment value repeated over the segment
+    samples = np.column_stack((values[:-1], cycle_values[:-1])).ravel()
+    repeats = np.column_stack((np.ones(len(values) - 1, dtype=int), np.maximum(segment_lengths[:-1], 0))).ravel()
+    cycle = np.concatenate((np.repeat(samples, repeats), values[-1:]))
+
+    return cycle
 
 
 # In[8]:
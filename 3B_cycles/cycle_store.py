@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Cycle_store compiles the bundled driving cycles, their target paths, extrema and path parameters into one .npz file."""
+
+import argparse
+import hashlib
+import os
+import warnings
+import zipfile
+import zlib
+import numpy as np
+import cycle_preparation as cp
+import path_parameters as pp
+
+
+# Format of the store, increased whenever its layout or the preparation of the cycles changes
+version = 2
+
+folder = os.path.dirname(os.path.abspath(__file__))
+default_store = os.path.join(folder, 'cycles.npz')
+
+# Arrays stored for every cycle and limit
+fields = ['cycle', 'distance', 'extrema_values', 'extrema_indices', 'path', 'idle_time', 'parameters']
+
+# Arrays describing the whole store (sources: cycle files relative to the store folder, checksums: their SHA-1)
+index_fields = ['version', 'names', 'sources', 'checksums', 'limits', 'rows']
+
+# SHA-1 of the cycle files already read, keyed by file name, modification time and size
+hashes = {}
+
+
+def key(name, limit, field):
+    """
+    Name of an array of the store, e.g. 'wltp:0.2:path'.
+    """
+    return f"{name}:{limit:g}:{field}"
+
+
+def checksum(file_name):
+    """
+    SHA-1 of a file, computed again only when its modification time or size changed.
+    """
+    status = os.stat(file_name)
+    signature = (os.path.abspath(file_name), status.st_mtime_ns, status.st_size)
+    if signature not in hashes:
+        with open(file_name, 'rb') as file:
+            hashes[signature] = hashlib.sha1(file.read()).hexdigest()
+    return hashes[signature]
+
+
+def compile_cycle(file_name, limits):
+    """
+    Prepare a driving cycle for each smoothing limit.
+
+    Parameters:
+    file_name (str): Path to the cycle file.
+    limits (list): Smoothing limits (0: no smoothing).
+
+    Returns:
+    dict: Arrays of the cycle keyed by store name (see key).
+    """
+    name = os.path.splitext(os.path.basename(file_name))[0]
+    arrays = {}
+    for limit in limits:
+        prepared = cp.cycle_prepared(file_name, limit)
+        values = [prepared[4], prepared[1], prepared[2][0], prepared[2][1], prepared[3], prepared[5], pp.catalogue_parameters(prepared)]
+        for field, value in zip(fields, values):
+            arrays[key(name, limit, field)] = np.asarray(value, dtype=float if field != 'extrema_indices' else int)
+    return arrays
+
+
+def build(files, limits=(0, 0.2), store=default_store):
+    """
+    Compile driving cycles into a store. Files that are not speed traces are skipped.
+
+    Parameters:
+    files (list): Cycle files.
+    limits (list): Smoothing limits compiled for every cycle.
+    store (str): Path of the .npz file written.
+
+    Returns:
+    list: Names of the compiled cycles.
+    """
+    arrays = {}
+    names = []
+    sources = []
+    checksums = []
+    for file_name in files:
+        try:
+            arrays.update(compile_cycle(file_name, limits))
+        except (ValueError, IndexError) as error:
+            warnings.warn(f"Skipped {file_name}: {error}")
+            continue
+        names.append(os.path.splitext(os.path.basename(file_name))[0])
+        sources.append(os.path.relpath(os.path.abspath(file_name), os.path.dirname(os.path.abspath(store))))
+        checksums.append(checksum(file_name))
+
+    np.savez_compressed(store, version=version, names=np.array(names), sources=np.array(sources), checksums=np.array(checksums),
+                        limits=np.array(limits, dtype=float), rows=np.array(pp.rows), **arrays)
+    return names
+
+
+def read_index(data, store):
+    """
+    Index arrays of an opened store (see index_fields), checking its version.
+    """
+    stored = int(data['version']) if 'version' in data.files else 0
+    if stored != version:
+        raise ValueError(f"{store} has version {stored}, expected {version}: rebuild it with cycle_store.py")
+    return {field: data[field] for field in index_fields}
+
+
+def load(store=default_store):
+    """
+    Read the index of a store (see index_fields), checking its version.
+
+    Parameters:
+    store (str): Path of the .npz file.
+
+    Returns:
+    dict: Index arrays of the store.
+    """
+    with np.load(store) as data:
+        return read_index(data, store)
+
+
+def cycle(name, limit=0.2, store=default_store):
+    """
+    Stored data of a driving cycle, read with the index of the store in one opening of the file.
+    The checksum of the cycle file is verified first: a cycle whose file changed since the store was built,
+    or whose arrays cannot be read back, is prepared again from the file (with a warning).
+
+    Parameters:
+    name (str): Cycle name (file name without extension, e.g. 'wltp').
+    limit (float): Smoothing limit.
+    store (str): Path of the store.
+
+    Returns:
+    dict: Arrays of the cycle keyed by field (see fields), and 'rows' the rows of its parameters.
+    """
+    with np.load(store) as data:
+        index = read_index(data, store)
+        names = [str(stored) for stored in index['names']]
+        if name not in names or limit not in index['limits']:
+            raise KeyError(f"Cycle '{name}' with limit {limit:g} is not in the store")
+        k = names.index(name)
+        file_name = os.path.join(os.path.dirname(os.path.abspath(store)), str(index['sources'][k]))
+
+        if not os.path.exists(file_name) or checksum(file_name) == str(index['checksums'][k]):
+            try:
+                return dict({field: data[key(name, limit, field)] for field in fields}, rows=index['rows'])
+            except (KeyError, ValueError, zipfile.BadZipFile, zlib.error) as error:
+                if not os.path.exists(file_name):
+                    raise
+                warnings.warn(f"Unreadable arrays of '{name}' in {store} ({error}): prepared again from {file_name}")
+        else:
+            warnings.warn(f"{file_name} changed since {store} was built: prepared again")
+
+    arrays = compile_cycle(file_name, [limit])
+    return dict({field: arrays[key(name, limit, field)] for field in fields}, rows=index['rows'])
+
+
+def parameters(name, limit=0.2, store=default_store):
+    """
+    Path parameters of a driving cycle, keyed by the rows of the path catalogue (3D_PETRAUL/path.csv).
+    """
+    arrays = cycle(name, limit, store)
+    return {str(row): float(value) for row, value in zip(arrays['rows'], arrays['parameters'])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('cycles', nargs='*', default=[os.path.join(folder, '*.csv')], help='cycle files, directories or glob patterns (default: the bundled cycles)')
+    parser.add_argument('-o', '--output', default=default_store, help='store written')
+    parser.add_argument('--limits', type=float, nargs='+', default=[0, 0.2], help='smoothing limits compiled for every cycle')
+    args = parser.parse_args()
+
+    files = pp.cycle_files(args.cycles)
+    names = build(files, args.limits, args.output)
+    print(f"{len(names)} cycles x {len(args.limits)} limits written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Cycle_streaming prepares the path target speed of driving cycles too large for memory, reading the speed trace in bounded chunks."""
+
+import csv
+import os
+import shutil
+import tempfile
+from itertools import islice
+import numpy as np
+import cycle_preparation as cp
+
+
+def cycle_chunks(file_name, chunk_size=10**6):
+    """
+    Read a driving cycle file chunk by chunk, converting speed data (same format as cycle_preparation.cycle_opening).
+
+    Parameters:
+    file_name (str): Path to the CSV file containing the cycle data.
+    chunk_size (int): Number of speed values per chunk.
+
+    Yields:
+    array: Consecutive chunks of speed values (converted from km/h to m/s).
+    """
+    with open(file_name, 'r') as file:
+        file_reader = csv.reader(file)
+
+        # Skip the cycle name
+        next(file_reader)
+
+        while True:
+            rows = list(islice(file_reader, chunk_size))
+            if not rows:
+                break
+            yield np.array([float(row[0]) / 3.6 for row in rows])
+
+
+def open_trace(file_name):
+    """
+    Memory-map a float64 trace written by cycle_prepared_streaming (read-only).
+    """
+    if os.path.getsize(file_name) == 0:
+        return np.zeros(0)
+    return np.memmap(file_name, dtype=np.float64, mode='r')
+
+
+def cycle_path_streaming(ext, file_name, chunk_size=10**6):
+    """
+    Reconstruct the path of a cycle extremum block by extremum block, writing it to a file (see cycle_preparation.cycle_path).
+
+    Parameters:
+    ext (tuple): Extrema values and positions.
+    file_name (str): Path of the float64 file receiving the path.
+    chunk_size (int): Number of extrema reconstructed at once.
+
+    Returns:
+    memmap: Reconstructed cycle path.
+    """
+    values, positions = ext
+    with open(file_name, 'wb') as file:
+        for start in range(0, len(values) - 1, chunk_size):
+            # Each block ends with the first extremum of the next block, rendered by cycle_path as the last value
+            stop = min(start + chunk_size, len(values) - 1)
+            block = cp.cycle_path((values[start:stop + 1], positions[start:stop + 1]))
+            file.write(block[:-1].tobytes())
+        file.write(np.asarray(values[-1:], dtype=np.float64).tobytes())
+    return open_trace(file_name)
+
+
+def cycle_prepared_streaming(file_name, limit=0, chunk_size=10**6, directory=None):
+    """
+    Prepare the path target speed from a driving cycle without holding the whole trace in memory.
+    The speed trace is read in chunks of chunk_size values; the cumulative distance, the last samples
+    (pending extrema) and the idle state are carried from one chunk to the next. The per-sample outputs
+    are written to files in directory and returned memory-mapped; only the extrema are kept in memory.
+    The outputs are the same as cycle_preparation.cycle_prepared.
+
+    Parameters:
+    file_name (str): Path to the cycle file.
+    limit (float): Threshold for smoothing extrema. If set to 0, no smoothing is applied.
+    chunk_size (int): Number of speed values processed at once.
+    directory (str): Folder receiving the cycle, distance and path files. By default a temporary folder, removed
+                     before returning: the memory maps stay readable once their files are deleted (POSIX systems).
+
+    Returns:
+    list: A list containing:
+          - Cycle name (str)
+          - Distance array (memmap)
+          - Extrema data (tuple of values and positions)
+          - Target speed (memmap)
+          - Original cycle data (memmap)
+          - Idle time (int)
+    """
+    # Extract cycle name from the file name
+    cycle_name = file_name[:-4]
+    temporary = directory is None
+    directory = directory or tempfile.mkdtemp(prefix='cycle_')
+    try:
+        base_name = os.path.join(directory, os.path.basename(cycle_name))
+
+        n = 0
+        distance = 0.0
+        tail = np.zeros(0)
+        first = last = None
+        idle_pairs = 0
+        extrema_values = []
+        extrema_indices = []
+
+        with open(base_name + '_cycle.bin', 'wb') as cycle_file, open(base_name + '_distance.bin', 'wb') as distance_file:
+            for chunk in cycle_chunks(file_name, chunk_size):
+                window = np.concatenate((tail, chunk))
+                start = n - len(tail)
+
+                # Cumulative distance, continued from the previous chunk
+                if n == 0:
+                    distances = cp.t_to_d(chunk)
+                else:
+                    steps = (window[len(tail):] + window[len(tail) - 1:-1]) / 2
+                    distances = np.cumsum(np.concatenate(([distance], steps)))[1:]
+                distance = distances[-1]
+
+                # Idle time steps (consecutive zero values) within the window, the last pair of the tail being already counted
+                pairs = np.count_nonzero((window[:-1] == 0) & (window[1:] == 0))
+                idle_pairs += pairs - (len(tail) == 2 and tail[0] == 0 and tail[1] == 0)
+
+                # Extrema strictly inside the window: every neighbour is known
+                if len(window) >= 3:
+                    values, indices = cp.extrema_standard(window)
+                    inner = (indices > 0) & (indices < len(window) - 1)
+                    extrema_values.append(values[inner])
+                    extrema_indices.append(indices[inner] + start)
+
+                if first is None:
+                    first = chunk[0]
+                last = chunk[-1]
+                n += len(chunk)
+                tail = window[-2:]
+
+                cycle_file.write(chunk.tobytes())
+                distance_file.write(distances.tobytes())
+
+        cycle = open_trace(base_name + '_cycle.bin')
+        list_D = open_trace(base_name + '_distance.bin')
+
+        # Idle time, with the wrap-around pair of cycle_preparation.idle_time
+        t_idle = idle_pairs + (n > 0 and first == 0 and last == 0) - 1
+
+        # Extrema, including the boundary points (0 and n - 1)
+        indice_list = np.concatenate(([0], *extrema_indices, [n - 1])).astype(int)
+        extrema_list = np.concatenate(([cycle[0]], *extrema_values, [cycle[n - 1]]))
+        ext = (extrema_list, indice_list)
+        if limit != 0:
+            ext = cp.smooth(cycle, list_D, extrema_list, indice_list, limit)
+
+        # Generate the cycle path
+        path = cycle_path_streaming(ext, base_name + '_path.bin', chunk_size)
+
+        return [cycle_name, list_D, ext, path, cycle, t_idle]
+    finally:
+        if temporary:
+            shutil.rmtree(directory, ignore_errors=True)
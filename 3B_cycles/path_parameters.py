@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Path_parameters evaluates the key path parameters of many driving cycles in parallel and writes them as a path.csv catalogue."""
+
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import cycle_preparation as cp
+
+
+# Rows of the path catalogue (3D_PETRAUL/path.csv)
+rows = ['J3', 'K1', 'K2', 'rate_acc', 'J0', 'H', 'w', 'Share urban', 'dist', 't_idle']
+
+# Upper speed limits of the city, suburban and countryside roads [m/s] (road type 0: stop)
+speed_limits = [0, 55 / 3.6, 75 / 3.6, 100 / 3.6]
+
+
+def type_road(path):
+    """
+    Classify road types based on speed limits, in one pass.
+
+    Parameters:
+    path (array): driving cycle (Array of speed).
+
+    Returns:
+    tuple:
+        - road (array): Array indicating road types (0: unknown, 1: city, 2: suburban road, 3: countryside, 4: highway).
+        - indices (list): List of indices for each road type.
+    """
+    # city roads: speed limitation < 55 km/h, suburban roads: 55-75 km/h, countryside roads: 75-100 km/h, highways: >100 km/h
+    road = np.digitize(path, speed_limits, right=True)
+
+    # Indices of each road type from one stable sort
+    order = np.argsort(road, kind='stable')
+    indices = np.split(order, np.cumsum(np.bincount(road, minlength=5))[:-1])
+    return road, [(index,) for index in indices]
+
+
+def path_integration(cycle_opened_smooth):
+    """
+    Calculate dynamic variables integrals evaluated from the path target speed (see variable_cycle_computation.ipynb).
+    These parameters characterized the path solely and are independent of the driver.
+    Global path parameters are calculated to characterize the whole journey.
+    The path is further analyzed and divided into subcycles depending on the type of road (city, suburban, countryside, and highway),
+    all the road types being integrated at once with grouped sums.
+
+    Parameters:
+    cycle_opened_smooth (list): Prepared cycle (see cycle_preparation.cycle_prepared).
+
+    Returns:
+    list: the path parameters, one list per type of road ([proportion, J3_path, K1, K1_non_exit, K2, nan, J0_path])
+          followed by the global ones ([dist_tot, J3_path, K1, K2, rate_acc, J0_path, urban_proportion]).
+    """
+    # Initialisation
+    list_D = cycle_opened_smooth[1]
+    dist_tot = list_D[-1]
+    diff_pos = np.concatenate(([0], np.diff(list_D)))
+
+    ext = cycle_opened_smooth[2]
+    values = np.array(ext[0])
+
+    # Preparation for calculating K1 and K2
+    values_2 = values ** 2 / 2
+    values_2_pos = np.diff(values_2)
+    values_3 = values ** 3 / 3
+    values_3_pos = np.diff(values_3)
+    kinetic_losses = np.where(values_2_pos < 0, -values_2_pos, 0)
+    cubic_losses = np.where(values_3_pos < 0, -values_3_pos, 0)
+
+    # determining the type of road along the journey and of each segment between extrema (type of its first point)
+    path = np.asarray(cycle_opened_smooth[3])
+    road = type_road(path)[0]
+    segment_road = road[ext[1][:-1]]
+
+    ### Calculate path parameters per road type first (grouped sums over the samples and the segments) ###
+
+    # for countryside and highway roads, the incidents related to exiting the road (last segment of a road type before
+    # another one) are neglected as their occurrence is too high in driving cycle.
+    non_exit = np.concatenate((segment_road[1:] == segment_road[:-1], [False]))
+
+    dist_type = np.bincount(road, weights=diff_pos, minlength=5)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        proportion = np.round(dist_type / dist_tot * 100, 1)
+        J3_type = np.round(np.bincount(road, weights=path ** 2 * diff_pos, minlength=5) / dist_type)
+        J0_type = np.round(np.bincount(road, weights=np.where(path > 0, diff_pos / path, 0), minlength=5) / dist_type, 3)
+        K1_type = np.round(np.bincount(segment_road, weights=kinetic_losses, minlength=5) / dist_type, 3)
+        K1_non_exit = np.round(np.bincount(segment_road[non_exit], weights=kinetic_losses[non_exit], minlength=5) / dist_type, 3)
+        K2_type = np.round(np.bincount(segment_road, weights=cubic_losses, minlength=5) / dist_type, 3)
+
+    # urban corresponds to city + suburban roads
+    urban_proportion = np.sum(proportion[1:3][dist_type[1:3] != 0])
+
+    results = []
+    for k in range(1, 5):
+        if dist_type[k] == 0:
+            results.append([np.nan] * 7)
+        elif k <= 2:
+            results.append([proportion[k], J3_type[k], K1_type[k], np.nan, K2_type[k], np.nan, J0_type[k]])
+        else:
+            results.append([proportion[k], J3_type[k], K1_type[k], K1_non_exit[k], K2_type[k], np.nan, J0_type[k]])
+
+    ### Calculate the global path parameters for the driving cycle ###
+
+    J3_path = np.sum(path ** 2 * diff_pos) / dist_tot
+    J0_path = np.sum(diff_pos[path > 0] / path[path > 0]) / dist_tot
+    K1 = np.sum(-values_2_pos[values_2_pos < 0]) / dist_tot
+    K2 = np.sum(-values_3_pos[values_3_pos < 0]) / dist_tot
+
+    incident_moy = np.sum((values_2[:-1] * values_2_pos)[values_2_pos > 0]) / (K1 * dist_tot)
+    top_moy = np.sum((values_2[1:] * values_2_pos)[values_2_pos > 0]) / (K1 * dist_tot)
+
+    rate_acc = np.sqrt((incident_moy + top_moy) / (2 * top_moy))
+
+    # Round final results
+    J3_path = round(J3_path)
+    J0_path = round(J0_path, 3)
+    K1 = round(K1, 3)
+    K2 = round(K2, 3)
+    rate_acc = round(rate_acc, 3)
+    dist_tot = round(dist_tot / 1000, 2)
+
+    results.append([dist_tot, J3_path, K1, K2, rate_acc, J0_path, urban_proportion])
+
+    return results
+
+
+def catalogue_parameters(cycle_opened_smooth, H=0.002, w=4):
+    """
+    Path parameters of a prepared driving cycle, in the layout of the path catalogue.
+
+    Parameters:
+    cycle_opened_smooth (list): Prepared cycle (see cycle_preparation.cycle_prepared).
+    H (float): Road grade parameter of the catalogue (not derived from the speed trace).
+    w (float): Wind parameter of the catalogue (not derived from the speed trace).
+
+    Returns:
+    list: Values of the catalogue rows (J3, K1, K2, rate_acc, J0, H, w, Share urban, dist [m], t_idle [s/m]).
+    """
+    # Idle time and distance of the original cycle
+    idle_time = cycle_opened_smooth[5]
+    total_distance = cycle_opened_smooth[1][-1]
+
+    # Path parameters from the smoothed target function
+    dist_tot, J3_path, K1, K2, rate_acc, J0_path, urban_proportion = path_integration(cycle_opened_smooth)[-1]
+
+    return [J3_path, K1, K2, rate_acc, J0_path, H, w, round(urban_proportion / 100, 3), round(total_distance), round(idle_time / total_distance, 4)]
+
+
+def cycle_parameters(file_name, limit_natural=0.2, H=0.002, w=4):
+    """
+    Path parameters of a driving cycle, in the layout of the path catalogue.
+    The cycle is smoothed with the limit of natural deceleration before the integration (as in variable_cycle_computation.ipynb).
+
+    Parameters:
+    file_name (str): Path to the cycle file.
+    limit_natural (float): The limit for the braking force to become a natural deceleration [m/s2].
+    H (float): Road grade parameter of the catalogue (not derived from the speed trace).
+    w (float): Wind parameter of the catalogue (not derived from the speed trace).
+
+    Returns:
+    list: Values of the catalogue rows (J3, K1, K2, rate_acc, J0, H, w, Share urban, dist [m], t_idle [s/m]).
+    """
+    return catalogue_parameters(cp.cycle_prepared(file_name, np.round(limit_natural, 2)), H, w)
+
+
+def cycle_files(patterns):
+    """
+    List the cycle files given as files, directories (all the CSV files inside) or glob patterns.
+
+    Parameters:
+    patterns (list): File names, directories or glob patterns.
+
+    Returns:
+    list: Sorted cycle file names, without duplicates.
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.csv')
+        files.update(glob.glob(pattern))
+    return sorted(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('cycles', nargs='+', help='cycle files, directories or glob patterns (one speed value in km/h per row after the cycle name)')
+    parser.add_argument('-o', '--output', default='path.csv', help='path catalogue written (semicolon CSV, one column per cycle)')
+    parser.add_argument('--limit', type=float, default=0.2, help='limit of natural deceleration used to smooth the cycles [m/s2]')
+    parser.add_argument('--H', type=float, default=0.002, help='road grade parameter written for every cycle')
+    parser.add_argument('--w', type=float, default=4, help='wind parameter written for every cycle')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes (default: number of CPUs)')
+    args = parser.parse_args()
+
+    files = cycle_files(args.cycles)
+    if not files:
+        parser.error('no cycle file found')
+
+    columns = {}
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(cycle_parameters, file_name, args.limit, args.H, args.w) for file_name in files]
+        for file_name, future in zip(files, futures):
+            name = os.path.splitext(os.path.basename(file_name))[0]
+            try:
+                columns[name] = future.result()
+            except Exception as error:
+                print(f"Skipped {file_name}: {error}", file=sys.stderr)
+
+    table = pd.DataFrame(columns, index=rows)
+    table.index.name = 'Path Variables'
+    table.to_csv(args.output, sep=';', encoding='utf-8-sig', float_format='%g')
+    print(f"{len(columns)} cycles written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""Checks of the extrema detection and smoothing of cycle_preparation against the former implementations, and of its streamed variant."""
+
+import glob
+import os
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.signal import argrelextrema
+import tempfile
+import cycle_preparation as cp
+import cycle_preparation_V1
+import cycle_preparation_v0
+import cycle_streaming
+import path_parameters
+
+folder = os.path.dirname(os.path.abspath(__file__))
+
+# Bundled driving cycles (the other CSV files are lists of cycle names)
+cycles = sorted(os.path.basename(file_name) for file_name in glob.glob(os.path.join(folder, '*.csv'))
+                if os.path.basename(file_name) not in ('cycle_for_config.csv', 'cycle_for_validation.csv'))
+
+limits = [0.05, 0.1, 0.2, 0.5, 1, 2]
+
+
+def reference_extrema_standard(lst):
+    """
+    Former extrema detection (argrelextrema and constant region bounds).
+    """
+    arr = np.array(lst)
+    maxima_indices = argrelextrema(arr, np.greater)[0]
+    minima_indices = argrelextrema(arr, np.less)[0]
+    diff_arr = np.diff(arr)
+    constant_start_indices = np.where(diff_arr[1:] == 0)[0]
+    constant_end_indices = np.where(diff_arr[:-1] == 0)[0]
+    unique_1 = np.setdiff1d(constant_start_indices, constant_end_indices)
+    unique_2 = np.setdiff1d(constant_end_indices, constant_start_indices)
+    indice_list = np.concatenate(([0, len(arr) - 1], maxima_indices, minima_indices, unique_1 + 1, unique_2 + 1))
+    indice_list.sort()
+    return np.array([arr[i] for i in indice_list]), indice_list
+
+
+def reference_smooth(arr, list_D, values, indice_list, limit):
+    """
+    Former smoothing rules (one braking region at a time), the checks beyond the last extremum failing instead of raising.
+    """
+    values = np.array(values, dtype=float)
+
+    def at(k):
+        return values[k] if k < len(values) else np.nan
+
+    list_incident_D = list_D[indice_list]
+
+    # Rule 1: Neglect low braking forces
+    diff_pos = np.diff(list_incident_D)
+    values_2_pos = np.diff(values ** 2 / 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        force = values_2_pos / diff_pos
+    indices_to_erase = []
+    for i in np.where((force < 0) & (force > -limit))[0]:
+        j = 1
+        if at(i + 1) == at(i + 2):
+            indices_to_erase.append(i + 1)
+            j += 1
+        if (values[i] > at(i + j + 1)) and (values[i + 1] < at(i + j + 1)):
+            indices_to_erase.append(i + j)
+            j += 1
+        mean_value = np.mean(arr[indice_list[i]:indice_list[i + j]])
+        if values[i] == values[i - 1]:
+            values[i - 1] = mean_value
+        values[i] = mean_value
+        values[i + j] = mean_value
+    values = np.delete(values, indices_to_erase)
+    indice_list = np.delete(indice_list, indices_to_erase)
+
+    # Rule 2: Detect gear changes during acceleration phases
+    extrema_duration = np.diff(indice_list)
+    diff_values = np.diff(values)
+    incident_pos = np.where(diff_values < 0)[0]
+    short_incident = incident_pos[np.where((extrema_duration[incident_pos] <= 2))[0]]
+    gear_change = incident_pos[np.where((diff_values[short_incident - 1] > 0) & (extrema_duration[short_incident - 1] > 3) &
+                                        (np.append(diff_values, 0)[short_incident + 1] > 0) &
+                                        (np.append(extrema_duration, 0)[short_incident + 1] > 3))[0]]
+    indice_to_erase = np.concatenate((gear_change, gear_change + 1))
+    return np.delete(values, indice_to_erase), np.delete(indice_list, indice_to_erase)
+
+
+def reference_path_integration(cycle_opened_smooth):
+    """
+    Former sub-cycle integrals (one road type at a time, as in variable_cycle_computation.ipynb), without the global parameters.
+    """
+    list_D = cycle_opened_smooth[1]
+    dist_tot = list_D[-1]
+    diff_pos = np.concatenate(([0], np.diff(list_D)))
+    ext = cycle_opened_smooth[2]
+    values = np.array(ext[0])
+    values_2_pos = np.diff(values ** 2 / 2)
+    values_3_pos = np.diff(values ** 3 / 3)
+    path = np.asarray(cycle_opened_smooth[3])
+    road = np.zeros(len(path))
+    for k, speed_limit in enumerate([0, 55 / 3.6, 75 / 3.6, 100 / 3.6]):
+        road[np.where(path > speed_limit)] = k + 1
+
+    results = []
+    for k in range(1, 5):
+        indices = np.where(road == k)
+        dist_type = np.sum(diff_pos[indices])
+        if dist_type == 0:
+            results.append([np.nan] * 7)
+            continue
+        proportion = round(dist_type / dist_tot * 100, 1)
+        incident = np.where(np.isin(ext[1][:-1], indices))[0]
+        values_2_incident = values_2_pos[incident]
+        values_3_incident = values_3_pos[incident]
+        J3_path = np.sum(path[indices] ** 2 * diff_pos[indices]) / dist_type
+        J0_path = np.sum(diff_pos[indices] / path[indices]) / dist_type
+        K1 = np.sum(-values_2_incident[values_2_incident < 0]) / dist_type
+        K2 = np.sum(-values_3_incident[values_3_incident < 0]) / dist_type
+        diff_incident = np.concatenate((np.diff(incident), [len(ext[0]) - incident[-1]]))
+        values_2_non_exit = values_2_pos[incident[diff_incident == 1]]
+        K1_non_exit = np.sum(-values_2_non_exit[values_2_non_exit < 0]) / dist_type
+        K1_non_exit = np.nan if k <= 2 else round(K1_non_exit, 3)
+        results.append([proportion, round(J3_path), round(K1, 3), K1_non_exit, round(K2, 3), np.nan, round(J0_path, 3)])
+    return results
+
+
+def opened(cycle):
+    return np.array(cp.cycle_opening(os.path.join(folder, cycle)))
+
+
+@pytest.mark.parametrize('cycle', cycles)
+def test_extrema_standard_bundled(cycle):
+    speed = opened(cycle)
+    values, indices = cp.extrema_standard(speed)
+    expected_values, expected_indices = reference_extrema_standard(speed)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_array_equal(values, expected_values)
+
+
+@pytest.mark.parametrize('values', [
+    [5.0],
+    [0.0, 0.0],
+    [3.0, 3.0, 3.0, 3.0],
+    [0.0, 1.0],
+    [0.0, 1.0, 1.0, 0.0],
+    [1.0, 1.0, 0.0],
+    [0.0, 1.0, 1.0],
+    [0.0, 1.0, 1.0, 1.0],
+    [1.0, 1.0, 1.0, 0.0],
+    [0.0, 1.0, 1.0, 2.0],
+    [0.0, 1.0, 0.0, 0.0],
+    [2.0, 1.0, 2.0, 1.0, 2.0],
+    [0.0, 0.0, 1.0, 2.0, 2.0, 1.0, 1.0, 3.0, 3.0],
+])
+def test_extrema_standard_edges(values):
+    # Plateaus, first and last samples, length 1 and constant inputs
+    extrema_values, indices = cp.extrema_standard(values)
+    expected_values, expected_indices = reference_extrema_standard(values)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_array_equal(extrema_values, expected_values)
+
+
+def test_extrema_standard_random():
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        values = rng.integers(0, 3, rng.integers(1, 12)).astype(float)
+        extrema_values, indices = cp.extrema_standard(values)
+        expected_values, expected_indices = reference_extrema_standard(values)
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_array_equal(extrema_values, expected_values)
+
+
+@pytest.mark.parametrize('cycle', cycles)
+def test_extrema_limit_0_bundled(cycle):
+    speed = opened(cycle)
+    expected_values, expected_indices = reference_extrema_standard(speed)
+    for module in (cp, cycle_preparation_V1, cycle_preparation_v0):
+        values, indices = module.extrema(list(speed), 0)
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_array_equal(values, expected_values)
+
+
+@pytest.mark.parametrize('limit', limits)
+@pytest.mark.parametrize('cycle', cycles)
+def test_smooth_bundled(cycle, limit):
+    speed = opened(cycle)
+    list_D = cp.t_to_d(speed)
+    values, indices = reference_extrema_standard(speed)
+    expected_values, expected_indices = reference_smooth(speed, list_D, values, indices, limit)
+    smoothed_values, smoothed_indices = cp.smooth(speed, list_D, values.astype(float), indices, limit)
+    np.testing.assert_array_equal(smoothed_indices, expected_indices)
+    np.testing.assert_allclose(smoothed_values, expected_values, rtol=1e-12)
+
+
+@pytest.mark.parametrize('cycle, limit', [('wltp.csv', 0.5), ('NEDC_2.csv', 1), ('US06_3.csv', 5)])
+def test_extrema_smooth_high_limit(cycle, limit):
+    # A braking on the last extrema used to read past the end of the extrema (IndexError)
+    speed = opened(cycle)
+    values, indices = cp.extrema_smooth(speed, limit)
+    assert indices[0] == 0 and indices[-1] == len(speed) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert len(values) == len(indices)
+
+
+def test_extrema_smooth_short_incident_at_end():
+    # A short incident on the last step of the cycle used to look for the following acceleration (IndexError)
+    values, indices = cp.extrema_smooth([0, 1, 2, 3, 4, 5, 6, 7, 8, 7.9], 0.01)
+    np.testing.assert_array_equal(indices, [0, 8, 9])
+    np.testing.assert_array_equal(values, [0, 8, 7.9])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 100, 10**6])
+@pytest.mark.parametrize('limit', [0, 0.2, 1])
+@pytest.mark.parametrize('cycle', cycles)
+def test_cycle_prepared_streaming(cycle, limit, chunk_size, tmp_path, monkeypatch):
+    # Same outputs as cycle_prepared whatever the chunks, the temporary folder being removed
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    file_name = os.path.join(folder, cycle)
+    name, list_D, (values, indices), path, speed, t_idle = cycle_streaming.cycle_prepared_streaming(file_name, limit, chunk_size)
+    expected = cp.cycle_prepared(file_name, limit)
+    assert name == expected[0] and t_idle == expected[5]
+    np.testing.assert_array_equal(speed, expected[4])
+    np.testing.assert_allclose(list_D, expected[1], rtol=1e-12)
+    np.testing.assert_array_equal(indices, expected[2][1])
+    np.testing.assert_allclose(values, expected[2][0], rtol=1e-12)
+    np.testing.assert_allclose(path, expected[3], rtol=1e-12)
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize('limit', [0, 0.2, 1])
+@pytest.mark.parametrize('cycle', cycles)
+def test_path_integration_bundled(cycle, limit):
+    prepared = cp.cycle_prepared(os.path.join(folder, cycle), limit)
+    results = path_parameters.path_integration(prepared)
+    np.testing.assert_allclose(np.array(results[:4], dtype=float), reference_path_integration(prepared), rtol=1e-12)
+
+
+def test_wltp_path_parameters():
+    # WLTP smoothed with the default limit gives the EU_mix column of the path catalogue (distance rounded to 10 m)
+    expected = pd.read_csv(os.path.join(folder, '..', '3D_PETRAUL', 'path.csv'), index_col=0, sep=';', encoding='utf-8-sig')['EU_mix']
+    parameters = path_parameters.cycle_parameters(os.path.join(folder, 'wltp.csv'))
+    assert list(expected.index) == path_parameters.rows
+    np.testing.assert_allclose(parameters[:8] + parameters[9:], expected.drop('dist').to_numpy(), rtol=1e-12)
+    assert parameters[8] == pytest.approx(expected['dist'], abs=5)
+
+
+def test_path_parameters_main(tmp_path, monkeypatch, capsys):
+    cycle_folder = tmp_path / 'cycles'
+    cycle_folder.mkdir()
+    for cycle in ('wltp.csv', 'NEDC.csv', 'US06.csv'):
+        shutil.copy(os.path.join(folder, cycle), cycle_folder)
+    (cycle_folder / 'broken.csv').write_text('broken\nfast\n')
+    (cycle_folder / 'notes.txt').write_text('not a cycle\n')
+
+    # Directories, glob patterns and files, listed once each
+    files = path_parameters.cycle_files([str(cycle_folder), str(cycle_folder / 'wltp.*'), str(cycle_folder / 'US06.csv')])
+    assert [os.path.basename(file_name) for file_name in files] == ['NEDC.csv', 'US06.csv', 'broken.csv', 'wltp.csv']
+    assert path_parameters.cycle_files([str(tmp_path / 'missing')]) == []
+
+    output = tmp_path / 'path.csv'
+    monkeypatch.setattr(sys, 'argv', ['path_parameters.py', str(cycle_folder), '-o', str(output), '-j', '2', '--w', '3'])
+    path_parameters.main()
+    captured = capsys.readouterr()
+    assert '3 cycles written' in captured.out and 'Skipped' in captured.err and 'broken.csv' in captured.err
+
+    # Layout of the path catalogue, one column per valid cycle
+    table = pd.read_csv(output, index_col=0, sep=';', encoding='utf-8-sig')
+    reference = pd.read_csv(os.path.join(folder, '..', '3D_PETRAUL', 'path.csv'), index_col=0, sep=';', encoding='utf-8-sig')
+    assert table.index.name == reference.index.name and list(table.index) == list(reference.index)
+    assert list(table.columns) == ['NEDC', 'US06', 'wltp']
+    for name in table.columns:
+        expected = path_parameters.cycle_parameters(os.path.join(folder, name + '.csv'), w=3)
+        np.testing.assert_allclose(table[name].to_numpy(), expected, rtol=1e-5)
+
+    monkeypatch.setattr(sys, 'argv', ['path_parameters.py', str(tmp_path / '*.none')])
+    with pytest.raises(SystemExit):
+        path_parameters.main()
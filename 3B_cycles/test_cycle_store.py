@@ -0,0 +1,85 @@
+"""Checks of the cycle store of cycle_store.py: round trip, version, checksums and unreadable arrays."""
+
+import os
+import shutil
+import zipfile
+import zlib
+import numpy as np
+import pytest
+import cycle_preparation as cp
+import cycle_store
+import path_parameters as pp
+
+folder = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def store(tmp_path):
+    for cycle in ('wltp.csv', 'NEDC.csv'):
+        shutil.copy(os.path.join(folder, cycle), tmp_path)
+    store = str(tmp_path / 'cycles.npz')
+    assert cycle_store.build(sorted(str(file_name) for file_name in tmp_path.glob('*.csv')), [0, 0.2], store) == ['NEDC', 'wltp']
+    return store
+
+
+def assert_prepared(arrays, file_name, limit):
+    prepared = cp.cycle_prepared(file_name, limit)
+    np.testing.assert_array_equal(arrays['path'], prepared[3])
+    np.testing.assert_array_equal(arrays['extrema_indices'], prepared[2][1])
+    np.testing.assert_array_equal(arrays['parameters'], pp.catalogue_parameters(prepared))
+
+
+def test_round_trip(store, tmp_path, monkeypatch):
+    opened = []
+    monkeypatch.setattr(np, 'load', lambda *arguments, load=np.load: opened.append(arguments) or load(*arguments))
+    arrays = cycle_store.cycle('wltp', 0.2, store)
+    assert len(opened) == 1
+    assert_prepared(arrays, str(tmp_path / 'wltp.csv'), 0.2)
+    assert list(arrays['rows']) == pp.rows
+    assert cycle_store.parameters('NEDC', 0, store) == dict(zip(pp.rows, pp.catalogue_parameters(cp.cycle_prepared(str(tmp_path / 'NEDC.csv'), 0))))
+    with pytest.raises(KeyError):
+        cycle_store.cycle('wltp', 1, store)
+
+
+def test_version_mismatch(store):
+    with np.load(store) as data:
+        arrays = dict(data)
+    arrays['version'] = cycle_store.version - 1
+    np.savez_compressed(store, **arrays)
+    for read in (cycle_store.load, lambda store: cycle_store.cycle('wltp', 0.2, store)):
+        with pytest.raises(ValueError, match='version'):
+            read(store)
+
+
+def test_changed_cycle(store, tmp_path):
+    # A cycle file edited after the build is prepared again from the file
+    file_name = tmp_path / 'wltp.csv'
+    lines = file_name.read_text().splitlines()
+    lines[100:110] = ['0'] * 10
+    file_name.write_text('\n'.join(lines) + '\n')
+    with pytest.warns(UserWarning, match='changed'):
+        arrays = cycle_store.cycle('wltp', 0.2, store)
+    assert_prepared(arrays, str(file_name), 0.2)
+
+
+def test_unreadable_arrays(store, tmp_path):
+    # A byte flipped in the compressed data of an array fails its CRC: the cycle is prepared again from the file
+    member = cycle_store.key('wltp', 0.2, 'path') + '.npy'
+    with zipfile.ZipFile(store) as archive:
+        info = archive.getinfo(member)
+    with open(store, 'r+b') as file:
+        file.seek(info.header_offset + 26)
+        name_length, extra_length = np.frombuffer(file.read(4), dtype='<u2')
+        position = info.header_offset + 30 + name_length + extra_length + info.compress_size // 2
+        file.seek(position)
+        byte = file.read(1)
+        file.seek(position)
+        file.write(bytes([byte[0] ^ 0xFF]))
+    with pytest.warns(UserWarning, match='Unreadable'):
+        arrays = cycle_store.cycle('wltp', 0.2, store)
+    assert_prepared(arrays, str(tmp_path / 'wltp.csv'), 0.2)
+
+    # Without the cycle file the error is raised
+    os.remove(tmp_path / 'wltp.csv')
+    with pytest.raises((zipfile.BadZipFile, zlib.error, ValueError)):
+        cycle_store.cycle('wltp', 0.2, store)
@@ -0,0 +1,23 @@
+"""Checks of the validation scores of the production model (validation.py)."""
+
+import time
+import pytest
+import validation
+
+
+def test_statistics():
+    results = validation.validate()
+    table = validation.statistics(results)
+    assert list(table.index) == ['GV', 'BEV', 'all']
+    assert table.loc['GV', 'tests'] == 83 and table.loc['BEV', 'tests'] == 18
+    assert table.loc['GV', 'MAE [%]'] == pytest.approx(3.23, abs=0.005)
+    assert table.loc['BEV', 'MAE [%]'] == pytest.approx(3.63, abs=0.005)
+    assert results['EC_model'].notna().all()
+
+
+def test_runtime():
+    # All the tests are evaluated in one batch per powertrain
+    validation.validate()
+    start = time.perf_counter()
+    validation.validate()
+    assert time.perf_counter() - start < 1
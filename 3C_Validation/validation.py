@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Validation scores the production model (3D_PETRAUL/model.py) against the empirical energy consumptions of the case studies.
+
+The production model differs from EC_calculation_th and EC_calculation_elec of validation_results_graphs.ipynb:
+- K1, K2, J0 and J3 are derived from K1p, K2p, J0p and J3p with the speed factor mu_v, set to 1 for the case studies
+  (the notebook takes the path values directly, so the results are the same).
+- Gasoline accessories use J0p (Pacc*(J0p+t_idle)) instead of the J0 of the acceleration phases.
+- Gasoline idling includes the pumping losses at N_idle (p0*D*N_idle**3*t_idle), which the notebook leaves out.
+- The electric wind term is not weighted by J1, and the electric wheel inertia is 4*Iw instead of 4*Iw/Rw**2.
+With these differences the mean absolute errors are 3.23% (GV, notebook 3.34%) and 3.63% (BEV, as in the notebook).
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(folder, '..', '3D_PETRAUL'))
+import catalogue
+import model
+from records import Body, ThermalEngine, Transmission, ElectricMotor, ElectricTransmission, Path, Driver, Battery
+
+
+# Internal resistance of the batteries of the case studies [ohm] (R_bat of validation_results_graphs.ipynb)
+R_bat = 0.35
+
+
+def tests(file_name):
+    """
+    Read the list of tests (one column per test: vehicle, cycle, engine, transmission, empirical EC).
+
+    Parameters:
+    file_name (str): Path to the EC_preparation CSV file.
+
+    Returns:
+    DataFrame: One row per test, with the columns vehicle, cycle, engine, trans and EC.
+    """
+    df = pd.read_csv(os.path.join(folder, file_name), sep=';', header=None, index_col=0, encoding='utf-8-sig').iloc[1:6].T
+    df.columns = ['vehicle', 'cycle', 'engine', 'trans', 'EC']
+    df['EC'] = df['EC'].astype(float)
+    return df.reset_index(drop=True)
+
+
+def rows(file_name, names):
+    """
+    Parameters of the case studies used by the tests, as float arrays (one row per parameter, in the order of the file).
+
+    Parameters:
+    file_name (str): Path to the *_preparation CSV file (parameters as rows, case studies as columns).
+    names (array): Case study of each test.
+
+    Returns:
+    array: Shape (number of parameters, number of tests).
+    """
+    frame = catalogue.load(os.path.join(folder, file_name)).frame
+    return frame[list(names)].to_numpy(dtype=float)
+
+
+def inputs_th(test):
+    """
+    Map the case studies of gasoline vehicle tests onto the parameter groups of model.evaluate_th.
+    The transmission ratio transf*transg, the cold start factor and the cargo and payload masses of the validation
+    inputs are folded into transf, cs and M_payload; PaM is converted to mu_a.
+
+    Parameters:
+    test (DataFrame): Tests (see tests).
+
+    Returns:
+    tuple: Body, ThermalEngine, Transmission, Path and Driver records (arrays with one value per test).
+    """
+    M_body, Payload, r0, Cd, A, Iw, Rw, transf, transg, stop_start = rows('body_preparation.csv', test['vehicle'])
+    P_max, ne, D, fmep0, p0, Q0, N_idle, cs = rows('engine_preparation.csv', test['engine'])
+    ntr, a_tr, S, Ne = rows('trans_preparation.csv', test['trans'])
+    (J3p, K1p, K2p, rate_acc, J0p, H, w, urban, B, PaM, mu_N, M_cargo, Pacc,
+     payload_factor, M_eq, Cd_eq, cold_start_fact, dist, t_idle) = rows('DC_preparation.csv', test['cycle'])
+
+    M_payload = M_cargo + payload_factor * Payload
+    mu_a = PaM * (M_body + M_payload + M_eq) / P_max
+
+    body = Body(M_body=M_body, r0=r0, Cd=Cd, A=A, Iw=Iw, Rw=Rw, transf=transf * transg, Pacc=Pacc, M_eq=M_eq, Cd_eq=Cd_eq)
+    engine = ThermalEngine(P_max=P_max, ne=ne, D=D, fmep0=fmep0, p0=p0, Q0=Q0, N_idle=N_idle, cs=cs * cold_start_fact, stop_start=stop_start)
+    trans = Transmission(ntr=ntr, a_tr=a_tr, S=S, Ne=Ne)
+    path = Path(J3p=J3p, K1p=K1p, K2p=K2p, rate_acc=rate_acc, J0p=J0p, H=H, w=w, urban=urban, dist=dist, t_idle=t_idle)
+    driver = Driver(B=B, mu_v=np.ones_like(B), mu_a=mu_a, mu_N=mu_N, M_payload=M_payload)
+    return body, engine, trans, path, driver
+
+
+def inputs_el(test):
+    """
+    Map the case studies of battery electric vehicle tests onto the parameter groups of model.evaluate_el.
+    The cargo and payload masses are folded into M_payload (the battery mass is part of M_body) and PaM is converted to mu_a.
+
+    Parameters:
+    test (DataFrame): Tests (see tests).
+
+    Returns:
+    tuple: Body, ElectricMotor, ElectricTransmission, Path, Driver and Battery records (arrays with one value per test).
+    """
+    M_body, Payload, r0, Cd, A, Iw, Rw, transf, P_bat, P_bat_min, U_bat, P_charg, n_bat = rows('body_preparation_EV.csv', test['vehicle'])
+    P_e, Tmax, ne, alpha, epsilon, betha = rows('engine_preparation_EV.csv', test['engine'])
+    a_tr, ntr = rows('trans_preparation_EV.csv', test['trans'])
+    (J3p, K1p, K2p, rate_acc, J0p, H, w, urban, B, PaM, mu_N, M_cargo, Pacc,
+     payload_factor, M_eq, Cd_eq, dist, t_idle) = rows('DC_preparation_EV.csv', test['cycle'])
+
+    M_payload = M_cargo + payload_factor * Payload
+    mu_a = PaM * (M_body + M_payload + M_eq) / P_e
+
+    body = Body(M_body=M_body, r0=r0, Cd=Cd, A=A, Iw=Iw, Rw=Rw, transf=transf, Pacc=Pacc, M_eq=M_eq, Cd_eq=Cd_eq)
+    engine = ElectricMotor(P_e=P_e, Tmax=Tmax, ne=ne, alpha=alpha, epsilon=epsilon, betha=betha)
+    trans = ElectricTransmission(a_tr=a_tr, ntr=ntr)
+    path = Path(J3p=J3p, K1p=K1p, K2p=K2p, rate_acc=rate_acc, J0p=J0p, H=H, w=w, urban=urban, dist=dist, t_idle=t_idle)
+    driver = Driver(B=B, mu_v=np.ones_like(B), mu_a=mu_a, mu_N=mu_N, M_payload=M_payload)
+    battery = Battery(R_bat=np.full_like(B, R_bat), U_bat=U_bat, M_bat=np.zeros_like(B), n_bat=n_bat)
+    return body, engine, trans, path, driver, battery
+
+
+def validate():
+    """
+    Energy consumption of every test with the production model, next to the empirical one.
+
+    Returns:
+    DataFrame: One row per test (powertrain, vehicle, cycle, engine, trans, EC, EC_model, error, relative error [%]).
+    """
+    results = []
+    for powertrain, file_name, inputs, batch in [('GV', 'EC_preparation.csv', inputs_th, model.EC_th_batch),
+                                                 ('BEV', 'EC_preparation_EV.csv', inputs_el, model.EC_el_batch)]:
+        test = tests(file_name)
+        test.insert(0, 'powertrain', powertrain)
+        test['EC_model'] = batch(*inputs(test))[0]
+        results.append(test)
+
+    results = pd.concat(results, ignore_index=True)
+    results['error'] = results['EC_model'] - results['EC']
+    results['relative_error'] = results['error'] / results['EC'] * 100
+    return results
+
+
+def statistics(results):
+    """
+    Error statistics of the model per powertrain and overall.
+
+    Parameters:
+    results (DataFrame): Validation results (see validate).
+
+    Returns:
+    DataFrame: Number of tests, mean relative error (bias), mean absolute, root mean square and maximum absolute relative errors [%].
+    """
+    def scores(relative_error):
+        return pd.Series({'tests': len(relative_error),
+                          'bias [%]': relative_error.mean(),
+                          'MAE [%]': relative_error.abs().mean(),
+                          'RMSE [%]': np.sqrt((relative_error ** 2).mean()),
+                          'max [%]': relative_error.abs().max()})
+
+    table = results.groupby('powertrain', sort=False)['relative_error'].apply(scores).unstack()
+    table.loc['all'] = scores(results['relative_error'])
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-o', '--output', help='write the results of every test (CSV)')
+    parser.add_argument('--details', action='store_true', help='print the results of every test')
+    parser.add_argument('--max-mae', type=float, help='fail (exit status 1) when the overall mean absolute relative error exceeds this value [%%]')
+    args = parser.parse_args()
+
+    results = validate()
+    table = statistics(results)
+
+    with pd.option_context('display.float_format', '{:.2f}'.format, 'display.width', 200, 'display.max_rows', None):
+        if args.details:
+            print(results.drop(columns='engine'))
+        print(table)
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    if args.max_mae is not None and table.loc['all', 'MAE [%]'] > args.max_mae:
+        print(f"Mean absolute error {table.loc['all', 'MAE [%]']:.2f}% exceeds {args.max_mae:g}%", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
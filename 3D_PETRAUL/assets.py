@@ -0,0 +1,55 @@
+"""Assets decodes and resizes the contributor pictures once per process and shares the encoded thumbnails between sessions."""
+
+import io
+import os
+import threading
+from PIL import Image
+
+
+folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pictures')
+size = (300, 250)
+
+cache = {}
+lock = threading.Lock()
+
+
+def render(file_name, size):
+    """
+    Decode a picture, resize it and encode it as PNG.
+
+    Parameters:
+    file_name (str): Path to the picture.
+    size (tuple): (width, height) of the thumbnail in pixels.
+
+    Returns:
+    bytes: PNG-encoded thumbnail.
+    """
+    with Image.open(file_name) as image:
+        resized_image = image.resize(size)
+    buffer = io.BytesIO()
+    resized_image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def thumbnail(name, size=size):
+    """
+    Return the thumbnail of a contributor picture, rendering it only when it is new or modified since the last call.
+
+    Parameters:
+    name (str): Contributor name, e.g. 'Body' for pictures/picture_Body.png.
+    size (tuple): (width, height) of the thumbnail in pixels.
+
+    Returns:
+    bytes: PNG-encoded thumbnail, ready for st.image.
+    """
+    path = os.path.join(folder, 'picture_' + name + '.png')
+    mtime = os.stat(path).st_mtime_ns
+    key = (path, size)
+    entry = cache.get(key)
+    if entry is None or entry[0] != mtime:
+        with lock:
+            entry = cache.get(key)
+            if entry is None or entry[0] != mtime:
+                entry = (mtime, render(path, size))
+                cache[key] = entry
+    return entry[1]
@@ -0,0 +1,282 @@
+"""
+Catalogue parses the pre-set configuration files once per process and shares them between sessions.
+The catalogues can be compiled into one memory-mappable bundle (python catalogue.py), loaded instead of the CSV files while they are unchanged.
+"""
+
+import json
+import os
+import sys
+import threading
+import warnings
+from collections import ChainMap, namedtuple
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+import model
+
+
+Catalogue = namedtuple('Catalogue', ['frame', 'scenarios'])
+Catalogue.__doc__ = """
+Parsed pre-set catalogue, shared by every session: treat it as read-only.
+
+Attributes:
+frame (DataFrame): Parameters as rows and configurations as columns.
+scenarios (mappingproxy): Read-only mapping of configuration name to the tuple of its parameters.
+"""
+
+Block = namedtuple('Block', ['parameters', 'units', 'labels', 'scenarios', 'values'])
+Block.__doc__ = """
+Catalogue of a compiled bundle (see compile_bundle).
+
+Attributes:
+parameters (list): Normalized parameter names (model names, see model.parameters_th and model.parameters_el).
+units (list): Unit of each parameter ('-' if dimensionless), the values being stored as in the CSV file (not converted).
+labels (list): Row labels of the CSV file.
+scenarios (list): Configuration names.
+values (memmap): Read-only float64 view of shape (parameters, scenarios), mapped from the bundle.
+"""
+
+cache = {}
+bundles = {}
+lock = threading.Lock()
+
+folder = os.path.dirname(os.path.abspath(__file__))
+default_bundle = os.path.join(folder, 'catalogues.bin')
+
+# Format of the bundle: magic, version, header length, JSON header, float64 data aligned on 64 bytes
+magic = b'PETRAUL\0'
+version = 1
+alignment = 64
+
+# Parameter names of each catalogue (positional order of the model groups)
+groups = {
+    'body.csv': model.parameters_body,
+    'body_EV.csv': model.parameters_body,
+    'thermal.csv': model.parameters_th[1],
+    'thermal_ecoinvent.csv': model.parameters_th[1],
+    'transmission.csv': model.parameters_th[2],
+    'electric.csv': model.parameters_el[1],
+    'trans_EV.csv': model.parameters_el[2],
+    'path.csv': model.parameters_path,
+    'path_ecoinvent.csv': model.parameters_path,
+    'driver.csv': model.parameters_driver,
+    'battery.csv': model.parameters_el[5],
+}
+
+# Units in which the model equations expect the parameters (N_idle and Ne in rpm). The pre-set catalogues already hold
+# their values in these units, whatever the unit of their row labels (e.g. 'N_idle [rad/s]' holds rpm): nothing is converted.
+model_units = {
+    'M_body': 'kg', 'r0': '-', 'Cd': '-', 'A': 'm2', 'Iw': 'kg.m2', 'Rw': 'm', 'transf': '-', 'Pacc': 'W', 'M_eq': 'kg', 'Cd_eq': '-',
+    'P_max': 'W', 'ne': '-', 'D': 'L', 'fmep0': 'kPa', 'p0': 'kPa.s2', 'Q0': 'kPa/s', 'N_idle': 'rpm', 'cs': 'J/W/m', 'stop_start': '-',
+    'ntr': '-', 'a_tr': 's', 'S': 'J/m', 'Ne': 'rpm',
+    'P_e': 'W', 'Tmax': 'N.m', 'alpha': 'J', 'epsilon': '1/(N.m.s)', 'betha': 'W',
+    'J3p': 'm2/s2', 'K1p': 'm/s2', 'K2p': 'm2/s3', 'rate_acc': '-', 'J0p': 's/m', 'H': '-', 'w': 'm/s', 'urban': '-', 'dist': 'm', 't_idle': 's/m',
+    'B': 'm/s2', 'mu_v': '-', 'mu_a': '-', 'mu_N': '-', 'M_payload': 'kg',
+    'R_bat': 'ohm', 'U_bat': 'V', 'M_bat': 'kg', 'n_bat': '-',
+}
+
+
+def parse(file_name):
+    """
+    Parse a pre-set catalogue (semicolon CSV with one column per configuration).
+
+    Parameters:
+    file_name (str): Path to the CSV file.
+
+    Returns:
+    Catalogue: Parsed catalogue (empty trailing columns removed).
+    """
+    df = pd.read_csv(file_name, index_col=0, sep=';', encoding='utf-8-sig').dropna(axis=1, how='all')
+    scenarios = MappingProxyType({name: tuple(values) for name, values in df.to_dict(orient='list').items()})
+    return Catalogue(df, scenarios)
+
+
+def from_bundle(path, bundle=default_bundle):
+    """
+    Catalogue read from the compiled bundle, or None if the bundle is missing, outdated or does not contain the file.
+
+    Parameters:
+    path (str): Absolute path to the CSV file.
+    bundle (str): Path of the bundle.
+
+    Returns:
+    Catalogue: Catalogue whose frame is a view of the bundle.
+    """
+    name = os.path.basename(path)
+    if os.path.dirname(path) != os.path.dirname(os.path.abspath(bundle)) or not os.path.exists(bundle):
+        return None
+    mtime = os.stat(bundle).st_mtime_ns
+    entry = bundles.get(bundle)
+    if entry is None or entry[0] != mtime:
+        try:
+            entry = (mtime, open_bundle(bundle))
+        except (OSError, ValueError) as error:
+            warnings.warn(f"Ignored {bundle}: {error}")
+            entry = (mtime, {None: {'catalogues': {}}})
+        bundles[bundle] = entry
+
+    source = entry[1][None]['catalogues'].get(name)
+    stat = os.stat(path)
+    if source is None or source['mtime'] != stat.st_mtime_ns or source['size'] != stat.st_size:
+        return None
+    block = entry[1][name]
+    df = pd.DataFrame(block.values, index=pd.Index(block.labels, name=source['index_name']), columns=block.scenarios, copy=False)
+    scenarios = MappingProxyType(dict(zip(block.scenarios, map(tuple, block.values.T.tolist()))))
+    return Catalogue(df, scenarios)
+
+
+def load(file_name):
+    """
+    Return the parsed catalogue, parsing the file only when it is new or modified since the last call.
+    Catalogues of an up-to-date bundle (see compile_bundle) are mapped from it instead of parsed.
+
+    Parameters:
+    file_name (str): Path to the CSV file.
+
+    Returns:
+    Catalogue: Shared parsed catalogue.
+    """
+    path = os.path.abspath(file_name)
+    mtime = os.stat(path).st_mtime_ns
+    entry = cache.get(path)
+    if entry is None or entry[0] != mtime:
+        with lock:
+            entry = cache.get(path)
+            if entry is None or entry[0] != mtime:
+                entry = (mtime, from_bundle(path) or parse(path))
+                cache[path] = entry
+    return entry[1]
+
+
+def overlay(file_name):
+    """
+    Per-session dictionary of configurations on top of the shared catalogue.
+    Edited and new configurations are written to the session layer only; the pre-set ones stay shared.
+
+    Parameters:
+    file_name (str): Path to the CSV file.
+
+    Returns:
+    ChainMap: Configuration name -> parameters, with the session edits first.
+    """
+    return ChainMap({}, load(file_name).scenarios)
+
+
+def split_label(label):
+    """
+    Split a row label such as 'Pmax [W]' into its name and unit ('-' if the label has no unit).
+    """
+    name, _, unit = str(label).partition('[')
+    unit = unit.rstrip('] ').strip()
+    return name.strip(), unit if unit else '-'
+
+
+def normalize(file_name, labels):
+    """
+    Normalized parameter names and units of a catalogue: the model names and units for the known catalogues (see groups
+    and model_units), the names and units of the row labels otherwise. Only the names and units are normalized, not the values.
+
+    Parameters:
+    file_name (str): Name of the CSV file.
+    labels (list): Row labels of the catalogue.
+
+    Returns:
+    tuple: Parameter names and units.
+    """
+    names = groups.get(os.path.basename(file_name))
+    if names is None or len(names) != len(labels):
+        split = [split_label(label) for label in labels]
+        return [name.replace(' ', '_') for name, unit in split], [unit for name, unit in split]
+    return list(names), [model_units[name] for name in names]
+
+
+def compile_bundle(files=None, output=default_bundle):
+    """
+    Compile pre-set catalogues into one memory-mappable file: a JSON header (names, units, labels, configurations,
+    source files) followed by the float64 values of every catalogue, parameters as rows. The values are written as they are
+    in the CSV files: the units of the header (see normalize) describe them, no unit conversion is applied.
+
+    Parameters:
+    files (list): Catalogue files (default: every CSV file of the PETRAUL folder).
+    output (str): Path of the bundle written.
+
+    Returns:
+    list: Names of the compiled catalogues.
+    """
+    if files is None:
+        files = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith('.csv'))
+
+    header = {'version': version, 'catalogues': {}}
+    blocks = []
+    offset = 0
+    for file_name in files:
+        try:
+            frame = parse(file_name).frame
+            values = np.ascontiguousarray(frame.to_numpy(dtype=float))
+        except ValueError as error:
+            print(f"Skipped {file_name}: {error}", file=sys.stderr)
+            continue
+        stat = os.stat(file_name)
+        parameters, parameter_units = normalize(file_name, frame.index)
+        header['catalogues'][os.path.basename(file_name)] = {
+            'parameters': parameters, 'units': parameter_units,
+            'labels': [str(label) for label in frame.index], 'index_name': frame.index.name,
+            'scenarios': [str(name) for name in frame.columns],
+            'offset': offset, 'shape': list(values.shape),
+            'mtime': stat.st_mtime_ns, 'size': stat.st_size,
+        }
+        blocks.append(values.ravel())
+        offset += values.size
+
+    encoded = json.dumps(header).encode()
+    start = len(magic) + 8 + len(encoded)
+    encoded += b' ' * (-start % alignment)
+    with open(output, 'wb') as file:
+        file.write(magic)
+        file.write(np.uint64(len(encoded)).tobytes())
+        file.write(encoded)
+        file.write(np.concatenate(blocks or [np.zeros(0)]).astype('<f8').tobytes())
+    return list(header['catalogues'])
+
+
+def open_bundle(bundle=default_bundle):
+    """
+    Map a compiled bundle (see compile_bundle) without parsing any CSV: every catalogue is a read-only view of one memory map.
+
+    Parameters:
+    bundle (str): Path of the bundle.
+
+    Returns:
+    dict: Block keyed by catalogue file name, and the header (with the source mtime and size of each catalogue) under None.
+    """
+    with open(bundle, 'rb') as file:
+        if file.read(len(magic)) != magic:
+            raise ValueError(f"{bundle} is not a catalogue bundle")
+        length = int(np.frombuffer(file.read(8), dtype='<u8')[0])
+        header = json.loads(file.read(length))
+    if header['version'] != version:
+        raise ValueError(f"{bundle} has version {header['version']}, expected {version}: recompile it with catalogue.py")
+
+    start = len(magic) + 8 + length
+    data = np.memmap(bundle, dtype='<f8', mode='r', offset=start) if os.path.getsize(bundle) > start else np.zeros(0)
+    blocks = {None: header}
+    for name, entry in header['catalogues'].items():
+        rows, n = entry['shape']
+        values = data[entry['offset']:entry['offset'] + rows * n].reshape(rows, n)
+        blocks[name] = Block(entry['parameters'], entry['units'], entry['labels'], entry['scenarios'], values)
+    return blocks
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Compile the pre-set catalogues into one memory-mappable bundle.')
+    parser.add_argument('catalogues', nargs='*', help='catalogue files (default: every CSV file of the PETRAUL folder)')
+    parser.add_argument('-o', '--output', default=default_bundle, help='bundle written')
+    args = parser.parse_args()
+
+    names = compile_bundle(args.catalogues or None, args.output)
+    print(f"{len(names)} catalogues written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
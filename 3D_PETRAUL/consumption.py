@@ -0,0 +1,104 @@
+"""Consumption memoizes the results and figures of the Energy Consumption page, keyed on the parameter vectors."""
+
+import threading
+from collections import OrderedDict
+import model
+
+
+evaluators = {'ICEV': model.evaluate_th, 'BEV': model.evaluate_el}
+
+
+class LRUCache:
+    """
+    Bounded mapping evicting the least recently used entry, shared by the sessions of the process.
+
+    Attributes:
+    maxsize (int): Maximum number of entries.
+    entries (OrderedDict): Cached values, from the least to the most recently used.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Return the cached value of key, calling compute() only on a miss.
+
+        Parameters:
+        key (hashable): Cache key.
+        compute (callable): Function without arguments returning the value.
+
+        Returns:
+        object: Cached or newly computed value.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+results = LRUCache(256)
+figures = LRUCache(64)
+
+
+def key(powertrain, parameters):
+    """
+    Hashable key of a configuration.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    parameters (list): Parameter groups as given by input_th.ask or input_elec.ask.
+
+    Returns:
+    tuple: Powertrain followed by one tuple of floats per group.
+    """
+    return (powertrain,) + tuple(tuple(float(x) for x in group) for group in parameters)
+
+
+def energy_consumption(powertrain, parameters):
+    """
+    Energy consumption, losses, operating efficiencies and PIECs of a configuration, computed once per configuration.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    parameters (list): Parameter groups as given by input_th.ask or input_elec.ask.
+
+    Returns:
+    tuple:
+        - EC (list): [EC, losses, nop] as returned by model.EC_th and model.EC_el (shared, do not modify).
+        - PIECs (tuple): PIECs as returned by model.PIEC_th and model.PIEC_el.
+    """
+    def compute():
+        EC, losses, nop, PIECs = evaluators[powertrain](*parameters)
+        return [float(EC), losses.tolist(), nop.tolist()], tuple(PIECs.tolist())
+
+    return results.get(key(powertrain, parameters), compute)
+
+
+def figure(name, powertrain, parameters, build):
+    """
+    Figure of a configuration, built once per configuration.
+
+    Parameters:
+    name (str): Kind of figure, e.g. 'comparison' or 'interactive'.
+    powertrain (str): 'ICEV' or 'BEV'.
+    parameters (list): Parameter groups as given by input_th.ask or input_elec.ask.
+    build (callable): Function without arguments building the figure.
+
+    Returns:
+    Figure: Cached figure (shared, do not modify).
+    """
+    return figures.get((name,) + key(powertrain, parameters), build)
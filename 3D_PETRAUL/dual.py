@@ -0,0 +1,152 @@
+"""Dual numbers for the forward-mode differentiation of the model equations."""
+
+import numpy as np
+
+
+def value_of(x):
+    return x.value if isinstance(x, Dual) else x
+
+
+def tangent_of(x):
+    return x.tangent if isinstance(x, Dual) else 0.0
+
+
+class Dual:
+    """
+    Value carrying its partial derivatives with respect to P inputs.
+
+    Attributes:
+    value (array): Value of the quantity, of any shape.
+    tangent (array): Partial derivatives, of shape (P,) + shape broadcastable with value.
+
+    The arithmetic operators, np.sqrt, np.maximum, np.where, np.broadcast_arrays and np.stack
+    propagate the derivatives, so the model equations run unchanged on Dual inputs.
+    """
+
+    __slots__ = ('value', 'tangent')
+
+    def __init__(self, value, tangent):
+        self.value = value
+        self.tangent = tangent
+
+    ### Arithmetic ###
+
+    def __add__(self, other):
+        return Dual(self.value + value_of(other), self.tangent + tangent_of(other))
+
+    def __radd__(self, other):
+        return Dual(value_of(other) + self.value, tangent_of(other) + self.tangent)
+
+    def __sub__(self, other):
+        return Dual(self.value - value_of(other), self.tangent - tangent_of(other))
+
+    def __rsub__(self, other):
+        return Dual(value_of(other) - self.value, tangent_of(other) - self.tangent)
+
+    def __mul__(self, other):
+        if not isinstance(other, Dual):
+            return Dual(self.value * other, self.tangent * other)
+        return Dual(self.value * other.value, self.tangent * other.value + self.value * other.tangent)
+
+    def __rmul__(self, other):
+        return Dual(other * self.value, other * self.tangent)
+
+    def __truediv__(self, other):
+        if not isinstance(other, Dual):
+            return Dual(self.value / other, self.tangent / other)
+        value = self.value / other.value
+        return Dual(value, (self.tangent - value * other.tangent) / other.value)
+
+    def __rtruediv__(self, other):
+        value = other / self.value
+        return Dual(value, -value * self.tangent / self.value)
+
+    def __neg__(self):
+        return Dual(-self.value, -self.tangent)
+
+    def __pow__(self, exponent):
+        return Dual(self.value ** exponent, exponent * self.value ** (exponent - 1) * self.tangent)
+
+    ### Comparisons (on values only) ###
+
+    def __lt__(self, other):
+        return self.value < value_of(other)
+
+    def __le__(self, other):
+        return self.value <= value_of(other)
+
+    def __gt__(self, other):
+        return self.value > value_of(other)
+
+    def __ge__(self, other):
+        return self.value >= value_of(other)
+
+    ### NumPy protocols ###
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        if ufunc is np.sqrt:
+            x, = inputs
+            value = np.sqrt(x.value)
+            return Dual(value, x.tangent / (2 * value))
+        if ufunc is np.maximum:
+            a, b = inputs
+            select = value_of(a) >= value_of(b)
+            return Dual(np.maximum(value_of(a), value_of(b)), np.where(select, tangent_of(a), tangent_of(b)))
+        operators = {
+            np.add: lambda a, b: a + b,
+            np.subtract: lambda a, b: a - b,
+            np.multiply: lambda a, b: a * b,
+            np.true_divide: lambda a, b: a / b,
+            np.greater: lambda a, b: value_of(a) > value_of(b),
+            np.less: lambda a, b: value_of(a) < value_of(b),
+        }
+        if ufunc in operators:
+            a, b = inputs
+            if not isinstance(a, Dual):
+                a = Dual(a, 0.0)
+            return operators[ufunc](a, b)
+        if ufunc is np.negative:
+            return -inputs[0]
+        return NotImplemented
+
+    def __array_function__(self, func, types, args, kwargs):
+        if func is np.where:
+            condition, x, y = args
+            return Dual(np.where(condition, value_of(x), value_of(y)), np.where(condition, tangent_of(x), tangent_of(y)))
+        if func is np.broadcast_arrays:
+            shape = np.broadcast_shapes(*[np.shape(value_of(x)) for x in args])
+            size = max(np.shape(tangent_of(x))[0] for x in args if isinstance(x, Dual))
+            return [Dual(np.broadcast_to(value_of(x), shape), np.broadcast_to(tangent_of(x), (size,) + shape)) for x in args]
+        if func is np.stack:
+            terms = args[0]
+            return Dual(np.stack([value_of(x) for x in terms]), np.stack([tangent_of(x) for x in terms], axis=1))
+        return NotImplemented
+
+
+def seed(groups):
+    """
+    Turn groups of parameter columns into Dual inputs, one derivative direction per parameter.
+    Scalar and array columns may be mixed: every column is broadcast to the common batch shape,
+    so that all the tangents have the shape (P,) + batch shape.
+
+    Parameters:
+    groups (list): Groups of float64 columns (e.g. [body, engine, trans, path, driver]).
+
+    Returns:
+    list: Same groups where each column is a Dual whose tangent is the unit vector of its parameter.
+    """
+    P = sum(len(group) for group in groups)
+    shape = np.broadcast_shapes(*[np.shape(column) for group in groups for column in group])
+    seeded = []
+    k = 0
+    for group in groups:
+        duals = []
+        for column in group:
+            tangent = np.zeros((P,) + (1,) * len(shape))
+            tangent[k] = 1
+            duals.append(Dual(np.broadcast_to(column, shape), tangent))
+            k += 1
+        seeded.append(duals)
+    return seeded
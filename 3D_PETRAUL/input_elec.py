@@ -2,26 +2,14 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 import model
-import pandas as pd
-from PIL import Image
+import catalogue
+import assets
 
 
 
-def file_opening_dict(name):
-    with open(name) as file_name:
-        df = pd.read_csv(file_name, index_col=0, sep=';')
-        scenarios = df.to_dict(orient='list')
-    return scenarios
+# Pre-set catalogues (parsed once per process, see catalogue.py)
+files = ['3D_PETRAUL/body_EV.csv', '3D_PETRAUL/electric.csv', '3D_PETRAUL/trans_EV.csv', '3D_PETRAUL/path.csv', '3D_PETRAUL/driver.csv', '3D_PETRAUL/battery.csv']
 
-# Load data
-body_dict = file_opening_dict('3D_PETRAUL/body_EV.csv')
-engine_dict = file_opening_dict('3D_PETRAUL/electric.csv')
-trans_dict = file_opening_dict('3D_PETRAUL/trans_EV.csv')
-path_dict = file_opening_dict('3D_PETRAUL/path.csv')
-driver_dict = file_opening_dict('3D_PETRAUL/driver.csv')
-battery_dict = file_opening_dict('3D_PETRAUL/battery.csv')
-
-st.session_state.dictionary_BEV=[body_dict,engine_dict,trans_dict,path_dict,driver_dict,battery_dict]
 element = ['Body', 'Engine', 'Drivetrain', 'Path', 'Driver','Battery']
 page=[7,8,9,11,12,10]
 
@@ -34,15 +22,13 @@ def category_to_parameter(categories, dictionary):
     return parameters
 
 def reset_current_dictionary(index):
-    st.session_state.dictionary_BEV[index] = file_opening_dict(
-        ['3D_PETRAUL/body_EV.csv', '3D_PETRAUL/electric.csv', '3D_PETRAUL/trans_EV.csv', '3D_PETRAUL/path.csv', '3D_PETRAUL/driver.csv', '3D_PETRAUL/battery.csv'][index]
-    )
+    st.session_state.dictionary_BEV[index] = catalogue.overlay(files[index])
     st.session_state.options_BEV[index] = '--Select--'
     st.success("Current dictionary has been reset and selection cleared!")
 
 def ask ():
     if "dictionary_BEV" not in st.session_state:
-        st.session_state.dictionary_BEV = [body_dict, engine_dict, trans_dict, path_dict, driver_dict,battery_dict]
+        st.session_state.dictionary_BEV = [catalogue.overlay(name) for name in files]
     if "options_BEV" not in st.session_state:
         st.session_state.options_BEV =['--Select--']*6
 
@@ -56,10 +42,7 @@ def ask ():
         
         with columns[i]:
             st.write(element[i])
-            image_name="3D_PETRAUL/pictures/picture_"+element[i]+".png"
-            image=Image.open(image_name)
-            resized_image = image.resize((300, 250))
-            st.image(resized_image)
+            st.image(assets.thumbnail(element[i]))
             
             options=['--Select--'] +list(st.session_state.dictionary_BEV[i].keys())
             index=options.index(st.session_state.options_BEV[i])
@@ -87,15 +70,12 @@ def details (i, order, parts, label_P, help, format):
     if "parameters_BEV" not in st.session_state:
         st.session_state.parameters_BEV = [[] for _ in range(len(element))]
     if "dictionary_BEV" not in st.session_state:
-        st.session_state.dictionary_BEV = [body_dict, engine_dict, trans_dict, path_dict, driver_dict,battery_dict]
+        st.session_state.dictionary_BEV = [catalogue.overlay(name) for name in files]
     if "options_BEV" not in st.session_state:
         st.session_state.options_BEV =['--Select--']*6
 
     st.title("Welcome to the Detailed Page for " + element[i])
-    image_name = "3D_PETRAUL/pictures/picture_" + element[i] + ".png"
-    image = Image.open(image_name)
-    resized_image = image.resize((300, 250))
-    st.image(resized_image)
+    st.image(assets.thumbnail(element[i]))
 
     options = ['--Select--'] + list(st.session_state.dictionary_BEV[i].keys())
     index = options.index(st.session_state.options_BEV[i])
@@ -105,7 +85,7 @@ def details (i, order, parts, label_P, help, format):
         st.warning("You must select an option to continue.")
     else:
         selected_category = st.session_state.options_BEV[i]
-        local_entries = [category_to_parameter([selected_category], [st.session_state.dictionary_BEV[i]])[0].copy()]     
+        local_entries = [list(category_to_parameter([selected_category], [st.session_state.dictionary_BEV[i]])[0])]     
         
         for x in range(len(order)):
             st.markdown("---")
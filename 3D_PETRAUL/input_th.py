@@ -2,24 +2,13 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 import model
-import pandas as pd
-from PIL import Image
+import catalogue
+import assets
 
 
-def file_opening_dict(name):
-    with open(name) as file_name:
-        df = pd.read_csv(file_name, index_col=0, sep=';')
-        scenarios = df.to_dict(orient='list')
-    return scenarios
+# Pre-set catalogues (parsed once per process, see catalogue.py)
+files = ['3D_PETRAUL/body.csv', '3D_PETRAUL/thermal.csv', '3D_PETRAUL/transmission.csv', '3D_PETRAUL/path.csv', '3D_PETRAUL/driver.csv']
 
-# Load data
-body_dict = file_opening_dict('3D_PETRAUL/body.csv')
-engine_dict = file_opening_dict('3D_PETRAUL/thermal.csv')
-trans_dict = file_opening_dict('3D_PETRAUL/transmission.csv')
-path_dict = file_opening_dict('3D_PETRAUL/path.csv')
-driver_dict = file_opening_dict('3D_PETRAUL/driver.csv')
-
-st.session_state.dictionary_ICEV = [body_dict, engine_dict, trans_dict, path_dict, driver_dict]
 element = ['Body', 'Engine', 'Drivetrain', 'Path', 'Driver']
 st.session_state.label_parameters = [['Mass [kg]', 'rolling factor [-]', 'Drag Resistance [-]', 'Frontal Area [m2]', 'Wheel Inertia', 'Wheel radius [m]', 'transf', 'Power accessories [W]', 'Additional Mass of Equipment [kg]', 'Additional Drag Resistance of Equipment [-]'],
                     ['Power Max Engine [W]', 'Engine Differential Efficiency (i.e. peak efficiency)', 'Engine Displacement [L]', 'friction mean effective pressure [kPa]', 'Pumping mean effect [kPa/s3]', 'Thermal mean effect [kPa.s]', 'Engine speed during idling [rpm]', 'cs', 'share of start and stop technology in the fleet'],
@@ -36,9 +25,7 @@ def category_to_parameter(categories, dictionary):
     return parameters
 
 def reset_current_dictionary(index):
-    st.session_state.dictionary_ICEV[index] = file_opening_dict(
-        ['3D_PETRAUL/body.csv', '3D_PETRAUL/thermal.csv', '3D_PETRAUL/trans.csv', '3D_PETRAUL/path.csv', '3D_PETRAUL/driver.csv'][index]
-    )
+    st.session_state.dictionary_ICEV[index] = catalogue.overlay(files[index])
     st.session_state.options_ICEV[index] = '--Select--'
     st.success("Current dictionary has been reset and selection cleared!")
 
@@ -47,7 +34,7 @@ def reset_current_dictionary(index):
 def ask ():
 
     if "dictionary_ICEV" not in st.session_state:
-        st.session_state.dictionary_ICEV = [body_dict, engine_dict, trans_dict, path_dict, driver_dict]
+        st.session_state.dictionary_ICEV = [catalogue.overlay(name) for name in files]
     if "options_ICEV" not in st.session_state:
         st.session_state.options_ICEV =['--Select--']*5
 
@@ -61,10 +48,7 @@ def ask ():
         
         with columns[i]:
             st.write(element[i])
-            image_name="3D_PETRAUL/pictures/picture_"+element[i]+".png"
-            image=Image.open(image_name)
-            resized_image = image.resize((300, 250))
-            st.image(resized_image)
+            st.image(assets.thumbnail(element[i]))
             
             options=['--Select--'] +list(st.session_state.dictionary_ICEV[i].keys())
             index=options.index(st.session_state.options_ICEV[i])
@@ -92,15 +76,12 @@ def details (i, order, parts, label_P, help, format):
     if "parameters_ICEV" not in st.session_state:
         st.session_state.parameters_ICEV = [[] for _ in range(len(element))]
     if "dictionary_ICEV" not in st.session_state:
-        st.session_state.dictionary_ICEV = [body_dict, engine_dict, trans_dict, path_dict, driver_dict]
+        st.session_state.dictionary_ICEV = [catalogue.overlay(name) for name in files]
     if "options_ICEV" not in st.session_state:
         st.session_state.options_ICEV =['--Select--']*5
 
     st.title("Welcome to the Detailed Page for " + element[i])
-    image_name = "3D_PETRAUL/pictures/picture_" + element[i] + ".png"
-    image = Image.open(image_name)
-    resized_image = image.resize((300, 250))
-    st.image(resized_image)
+    st.image(assets.thumbnail(element[i]))
 
     options = ['--Select--'] + list(st.session_state.dictionary_ICEV[i].keys())
     index = options.index(st.session_state.options_ICEV[i])
@@ -110,7 +91,7 @@ def details (i, order, parts, label_P, help, format):
         st.warning("You must select an option to continue.")
     else:
         selected_category = st.session_state.options_ICEV[i]
-        local_entries = [category_to_parameter([selected_category], [st.session_state.dictionary_ICEV[i]])[0].copy()]     
+        local_entries = [list(category_to_parameter([selected_category], [st.session_state.dictionary_ICEV[i]])[0])]     
         
         for x in range(len(order)):
             st.markdown("---")
@@ -5,6 +5,7 @@
 
 
 import numpy as np
+from dual import Dual, seed
 
 
 # In[2]:
@@ -18,17 +19,80 @@ Na_max=550
 B_lim=1.3
 
 
+### Names of the parameters (positional order of each group) ###
+parameters_body=['M_body','r0','Cd','A','Iw','Rw','transf','Pacc','M_eq','Cd_eq']
+parameters_path=['J3p','K1p','K2p','rate_acc','J0p','H','w','urban','dist','t_idle']
+parameters_driver=['B','mu_v','mu_a','mu_N','M_payload']
+parameters_th=[parameters_body,['P_max','ne','D','fmep0','p0','Q0','N_idle','cs','stop_start'],['ntr','a_tr','S','Ne'],parameters_path,parameters_driver]
+parameters_el=[parameters_body,['P_e','Tmax','ne','alpha','epsilon','betha'],['a_tr','ntr'],parameters_path,parameters_driver,['R_bat','U_bat','M_bat','n_bat']]
+
+
 # In[4]:
 
 
-def EC_th (body,engine,trans,path,driver):
+def columns (group,names=None):
+    """
+    Split a group of parameters (body, engine, trans, path, driver or battery) into float64 columns.
+
+    Parameters:
+    group: Parameters in the positional order of the group, given as
+           - a list/tuple of scalars, arrays or Duals (one entry per parameter),
+           - a record or struct-of-arrays of records.py (named tuple, checked against names),
+           - a 2D array of shape (n_parameters, n_configurations),
+           - a structured array with one field per parameter,
+           - a DataFrame with one column per parameter and one row per configuration.
+    names (list): Parameter names of the group, checked against the fields of a record or structured array
+                  and the columns of a DataFrame (same names in the same order).
+
+    Returns:
+    list: One float64 array per parameter, broadcastable against each other.
+    """
+    if hasattr(group,'_fields'):
+        fields=group._fields
+    elif isinstance(group, np.ndarray) and group.dtype.names:
+        fields=group.dtype.names
+    elif hasattr(group, 'columns'):
+        fields=group.columns
+    else:
+        fields=None
+    if names is not None and fields is not None and list(fields)!=list(names):
+        raise ValueError(f"{type(group).__name__} has the parameters {list(fields)}, expected {list(names)}")
+    if isinstance(group, np.ndarray) and group.dtype.names:
+        return [np.asarray(group[name], dtype=float) for name in group.dtype.names]
+    if hasattr(group, 'columns'):
+        return [group[name].to_numpy(dtype=float) for name in group.columns]
+    return [column if isinstance(column, Dual) else np.asarray(column, dtype=float) for column in group]
+
+
+def stack_terms (terms):
+    """Stack broadcastable arrays into one array with a leading axis per term."""
+    return np.stack(np.broadcast_arrays(*terms))
+
+
+def evaluate_th (body,engine,trans,path,driver,piec=True):
+    """
+    Energy consumption, losses, efficiencies and PIECs of gasoline vehicles for arrays of configurations.
+    The driving integrals are computed once and shared by the EC and the PIEC calculations.
+
+    Parameters:
+    body, engine, trans, path, driver: Parameter groups in the same positional order as EC_th.
+                                       Each parameter may be a scalar or an array (see columns).
+    piec (bool): Whether to compute the PIECs.
+
+    Returns:
+    tuple:
+        - EC (array): Energy consumption [L/100km] per configuration.
+        - losses (array): Shape (13, ...), losses in the order of EC_th.
+        - nop (array): Shape (3, ...), nop_engine, nop_transmission and nop.
+        - PIEC (array): Shape (11, ...), PIECs [kWh/100km/unit] in the order of PIEC_th (None if piec is False).
+    """
     
     ### inventories ###
-    M_body,r0,Cd,A,Iw,Rw,transf,Pacc,M_eq,Cd_eq=body
-    P_max,ne,D,fmep0,p0,Q0,N_idle,cs,stop_start=engine
-    ntr,a_tr,S,Ne=trans
-    J3p,K1p,K2p,rate_acc,J0p,H,w,urban,dist,t_idle=path
-    B,mu_v,mu_a,mu_N,M_payload=driver
+    M_body,r0,Cd,A,Iw,Rw,transf,Pacc,M_eq,Cd_eq=columns(body,parameters_body)
+    P_max,ne,D,fmep0,p0,Q0,N_idle,cs,stop_start=columns(engine,parameters_th[1])
+    ntr,a_tr,S,Ne=columns(trans,parameters_th[2])
+    J3p,K1p,K2p,rate_acc,J0p,H,w,urban,dist,t_idle=columns(path,parameters_path)
+    B,mu_v,mu_a,mu_N,M_payload=columns(driver,parameters_driver)
     LHV=fuel
 
     
@@ -49,9 +113,7 @@ def EC_th (body,engine,trans,path,driver):
     Nc=Ne*np.pi/30*mu_N
     N_idle=N_idle*np.pi/30
     Na=N_idle+np.sqrt(mu_a)*Na_max
-    
-    if Na<Nc:
-        Na=Nc
+    Na=np.maximum(Na,Nc)
     
     
     ### integration variables ###
@@ -96,7 +158,47 @@ def EC_th (body,engine,trans,path,driver):
     nop=nop_engine*nop_transmission
 
 
-    return EC,[rolling,drag,inertia,grade,wind,friction,pumping,thermal,accessories,transmission,synchronization,cold_engine,idling],[nop_engine,nop_transmission,nop]
+    losses=stack_terms([rolling,drag,inertia,grade,wind,friction,pumping,thermal,accessories,transmission,synchronization,cold_engine,idling])
+    nops=stack_terms([nop_engine,nop_transmission,nop])
+    
+    if not piec:
+        return EC,losses,nops,None
+    
+    
+    ### PIECs Calculations ###
+    conv=36
+    
+    MIEC = (r0*g*J1+K1+g*H)/conv/ne/ntr*100
+    r0IEC= (M_tot*g*J1)/conv/ne/ntr/1000
+    CdIEC=0.5*rho_air*Cd_eq*A*(J3+w*w*J1)/conv/ne/ntr/10
+    AIEC=0.5*rho_air*Cd*(J3+w*w*J1)/conv/ne/ntr
+    DIEC=(fmep0*(Chi1+N_idle*t_idle)+p0*(Chi3+N_idle*N_idle*N_idle*t_idle)+Q0*(J0+t_idle))/(4*np.pi)/conv/ne+cs*(P_max/D)/conv/dist+a_tr*(P_max/D)*Chi1/conv/ntr/ne
+    SIEC=fmep0/(4*np.pi)*D*(1-urban)*J1_cruise/conv/ne+p0/(4*np.pi)*D*(1-urban)*3*sigma_t*sigma_t*J3_cruise/conv/ne+cs*(P_max/sigma_t)/conv/dist+a_tr*(P_max/sigma_t)*Chi1/conv/ntr/ne+a_tr*P_max*(1-urban)*J1_cruise/conv/ntr/ne
+    f0IEC=D*Chi1/(4*np.pi)/conv/ne
+    p0IEC=D*Chi3/(4*np.pi)/conv/ne/1000
+    PaccIEC=(J0p+t_idle)/conv/ne*1000
+    MIEC_SE=MIEC+(D/M_tot)*DIEC*100
+    MIEC_SE_alt=MIEC+(sigma_t/M_tot)*SIEC*100
+    
+    return EC,losses,nops,stack_terms([MIEC,r0IEC,CdIEC,AIEC,DIEC,SIEC,f0IEC,p0IEC,PaccIEC,MIEC_SE,MIEC_SE_alt])
+
+
+def EC_th_batch (body,engine,trans,path,driver):
+    """
+    Energy consumption of gasoline vehicles for arrays of configurations (see evaluate_th).
+
+    Returns:
+    tuple: EC, losses (13, ...) and nop (3, ...) arrays.
+    """
+    
+    return evaluate_th(body,engine,trans,path,driver,piec=False)[:3]
+
+
+def EC_th (body,engine,trans,path,driver):
+    
+    EC,losses,nop=EC_th_batch(body,engine,trans,path,driver)
+    
+    return EC[()],list(losses),list(nop)
     
     
     
@@ -105,15 +207,31 @@ def EC_th (body,engine,trans,path,driver):
 # In[5]:
 
 
-def EC_el (body,engine,trans,path,driver,battery):
+def evaluate_el (body,engine,trans,path,driver,battery,piec=True):
+    """
+    Energy consumption, losses, efficiencies and PIECs of battery electric vehicles for arrays of configurations.
+    The driving integrals are computed once and shared by the EC and the PIEC calculations.
+
+    Parameters:
+    body, engine, trans, path, driver, battery: Parameter groups in the same positional order as EC_el.
+                                                Each parameter may be a scalar or an array (see columns).
+    piec (bool): Whether to compute the PIECs.
+
+    Returns:
+    tuple:
+        - EC (array): Energy consumption [kWh/100km] per configuration.
+        - losses (array): Shape (11, ...), losses in the order of EC_el.
+        - nop (array): Shape (4, ...), nop_engine, nop_transmission, nop_battery and nop.
+        - PIEC (array): Shape (9, ...), PIECs [kWh/100km/unit] in the order of PIEC_el (None if piec is False).
+    """
     
     ### inventories ###
-    M_body,r0,Cd,A,Iw,Rw,transf,Pacc,M_eq,Cd_eq=body
-    P_e,Tmax,ne,alpha,epsilon,betha=engine
-    a_tr,ntr=trans
-    J3p,K1p,K2p,rate_acc,J0p,H,w,urban,dist,t_idle=path
-    B,mu_v,mu_a,mu_N,M_payload=driver
-    R_bat,U_bat,M_bat,n_bat=battery
+    M_body,r0,Cd,A,Iw,Rw,transf,Pacc,M_eq,Cd_eq=columns(body,parameters_body)
+    P_e,Tmax,ne,alpha,epsilon,betha=columns(engine,parameters_el[1])
+    a_tr,ntr=columns(trans,parameters_el[2])
+    J3p,K1p,K2p,rate_acc,J0p,H,w,urban,dist,t_idle=columns(path,parameters_path)
+    B,mu_v,mu_a,mu_N,M_payload=columns(driver,parameters_driver)
+    R_bat,U_bat,M_bat,n_bat=columns(battery,parameters_el[5])
 
     
     
@@ -129,10 +247,7 @@ def EC_el (body,engine,trans,path,driver,battery):
     
     
     ## Regenerative Braking Efficiency ##
-    if B>B_lim/2:
-        nregen=1-(2*B-B_lim)*(2*B-B_lim)/(4*B*B)
-    else:
-        nregen=1
+    nregen=np.where(B>B_lim/2,1-(2*B-B_lim)*(2*B-B_lim)/(4*B*B),1)
 
     
     ### computed parameters for integration model ###
@@ -188,153 +303,102 @@ def EC_el (body,engine,trans,path,driver,battery):
     nop=nop_engine*nop_transmission*nop_battery
 
     
-    return EC,[rolling,drag,inertia,grade,wind,friction,copper,converter,accessories,transmission,battery],[nop_engine,nop_transmission,nop_battery,nop]
+    losses=stack_terms([rolling,drag,inertia,grade,wind,friction,copper,converter,accessories,transmission,battery])
+    nops=stack_terms([nop_engine,nop_transmission,nop_battery,nop])
     
+    if not piec:
+        return EC,losses,nops,None
     
     
+    ### PIECs Calculations ###
+    MIEC = (r0*g+K1*(1-nregen)+g*H)/conv/ne/ntr/n_bat*100
+    r0IEC= (M_tot*g)/conv/ne/ntr/n_bat/1000
+    CdIEC=0.5*rho_air*A*Cd_eq*(J3+w*w)/conv/ne/ntr/n_bat/10
+    AIEC=0.5*rho_air*Cd*(J3+w*w)/conv/ne/ntr/n_bat
+    PeIEC=a_tr*Chi1/conv/ntr/ne/n_bat*100000
+    SIEC=alpha/conv/ne/n_bat+a_tr*P_e/conv/ntr/ne/n_bat
+    PaccIEC=(J0p+t_idle)/conv/ne/n_bat*1000
+    MIEC_SE=MIEC+(P_e/M_tot)*PeIEC*100
+    MIEC_SE_alt=MIEC+(sigma_t/M_tot)*SIEC*100
+    
+    return EC,losses,nops,stack_terms([MIEC,r0IEC,CdIEC,AIEC,PeIEC,SIEC,PaccIEC,MIEC_SE,MIEC_SE_alt])
 
 
-# In[1]:
-
+def EC_el_batch (body,engine,trans,path,driver,battery):
+    """
+    Energy consumption of battery electric vehicles for arrays of configurations (see evaluate_el).
 
-def PIEC_th (body,engine,trans,path,driver):
+    Returns:
+    tuple: EC, losses (11, ...) and nop (4, ...) arrays.
+    """
     
-        ### inventories ###
-    M_body,r0,Cd,A,Iw,Rw,transf,Pacc,M_eq,Cd_eq=body
-    P_max,ne,D,fmep0,p0,Q0,N_idle,cs,stop_start=engine
-    ntr,a_tr,S,Ne=trans
-    J3p,K1p,K2p,rate_acc,J0p,H,w,urban,dist,t_idle=path
-    B,mu_v,mu_a,mu_N,M_payload=driver
-    LHV=fuel
+    return evaluate_el(body,engine,trans,path,driver,battery,piec=False)[:3]
 
+
+def EC_el (body,engine,trans,path,driver,battery):
     
-    ### calculated parameters ###
-    M_tot=M_body+M_payload+M_eq
-    Cd=Cd*Cd_eq
-    PaM=P_max/M_tot*mu_a
-    sigma_t=transf/Rw
-    conv=36
-    
-    ### computed parameters for integration model ###
-    
-    K1=K1p*mu_v*mu_v
-    K2=K2p*mu_v*mu_v*mu_v
-    ta=1/PaM*K1
-    da=1/PaM*K2
-    
-    Nc=Ne*np.pi/30*mu_N
-    N_idle=N_idle*np.pi/30
-    Na=N_idle+np.sqrt(mu_a)*Na_max
-    
-    if Na<Nc:
-        Na=Nc
-    
-    
-    ### integration variables ###
-    J1=1-K1/B
-    J1_cruise=1-K1/B-da
-    J0_cruise=J0p/mu_v*J1_cruise
-    J3_cruise=mu_v*mu_v*J3p*J1_cruise
-    J0=J0p/mu_v*(J1-da*(1-1/rate_acc))
-    J3=mu_v*mu_v*J3p*(J1-da*(1-rate_acc*rate_acc))
-    Chi1=urban*Nc*(J0_cruise)+(1-urban)*sigma_t*J1_cruise+Na*ta
-    Chi3=urban*Nc*Nc*Nc*J0_cruise+(1-urban)*sigma_t*sigma_t*sigma_t*J3_cruise+Na*Na*Na*ta
-    
-    ### PIECs Calculations ###
-    
-    ### External forces computation ###
-    
-    rolling=r0*M_tot*g*J1/conv/ne/ntr
-    drag=0.5*rho_air*Cd*A*J3/conv/ne/ntr
-    inertia=(M_tot+4*Iw/Rw/Rw)*K1/conv/ne/ntr
-    grade=M_tot*g*H/conv/ne/ntr
-    wind=0.5*rho_air*Cd*A*w*w*J1/conv/ne/ntr
+    EC,losses,nop=EC_el_batch(body,engine,trans,path,driver,battery)
     
-    ### powertrain losses computation ###
+    return EC[()],list(losses),list(nop)
     
-    friction=fmep0/(4*np.pi)*D*Chi1/conv/ne
-    pumping=p0/(4*np.pi)*D*Chi3/conv/ne
-    thermal=Q0*D*J0/conv/ne
-    cold_engine=cs*P_max/conv/dist
-    accessories=Pacc*(J0p+t_idle)/conv/ne
-    transmission=a_tr*P_max*Chi1/conv/ntr/ne
-    synchronization=urban*S/conv/ne
-    idling=(fmep0/(4*np.pi)*D*N_idle*t_idle/conv/ne+p0/(4*np.pi)*D*N_idle*N_idle*N_idle*t_idle/conv/ne+Q0*D*t_idle/conv/ne)*stop_start
     
     
-    MIEC = (r0*g*J1+K1+g*H)/conv/ne/ntr*100
-    r0IEC= (M_tot*g*J1)/conv/ne/ntr/1000
-    CdIEC=0.5*rho_air*Cd_eq*A*(J3+w*w*J1)/conv/ne/ntr/10
-    AIEC=0.5*rho_air*Cd*(J3+w*w*J1)/conv/ne/ntr
-    DIEC=(fmep0*(Chi1+N_idle*t_idle)+p0*(Chi3+N_idle*N_idle*N_idle*t_idle)+Q0*(J0+t_idle))/(4*np.pi)/conv/ne+cs*(P_max/D)/conv/dist+a_tr*(P_max/D)*Chi1/conv/ntr/ne
-    SIEC=fmep0/(4*np.pi)*D*(1-urban)*J1_cruise/conv/ne+p0/(4*np.pi)*D*(1-urban)*3*sigma_t*sigma_t*J3_cruise/conv/ne+cs*(P_max/sigma_t)/conv/dist+a_tr*(P_max/sigma_t)*Chi1/conv/ntr/ne+a_tr*P_max*(1-urban)*J1_cruise/conv/ntr/ne
-    f0IEC=D*Chi1/(4*np.pi)/conv/ne
-    p0IEC=D*Chi3/(4*np.pi)/conv/ne/1000
-    PaccIEC=(J0p+t_idle)/conv/ne*1000
-    MIEC_SE=MIEC+(D/M_tot)*DIEC*100
-    MIEC_SE_alt=MIEC+(sigma_t/M_tot)*SIEC*100
+
+
+# In[1]:
+
+
+def PIEC_th (body,engine,trans,path,driver):
     
-    return [MIEC,r0IEC,CdIEC,AIEC,DIEC,SIEC,f0IEC,p0IEC,PaccIEC,MIEC_SE,MIEC_SE_alt]
+    return evaluate_th(body,engine,trans,path,driver)[3].tolist()
 
 
 # In[ ]:
 
 def PIEC_el (body,engine,trans,path,driver,battery):
     
-    ### inventories ###
-    M_body,r0,Cd,A,Iw,Rw,transf,Pacc,M_eq,Cd_eq=body
-    P_e,Tmax,ne,alpha,epsilon,betha=engine
-    a_tr,ntr=trans
-    J3p,K1p,K2p,rate_acc,J0p,H,w,urban,dist,t_idle=path
-    B,mu_v,mu_a,mu_N,M_payload=driver
-    R_bat,U_bat,M_bat,n_bat=battery
+    return evaluate_el(body,engine,trans,path,driver,battery)[3].tolist()
 
-    
-    
-    ### calculated parameters ###
-    
-    conv=36
-    M_tot=M_body+M_payload+M_eq+M_bat
-    PaM=P_e/M_tot*mu_a
-    P_a=P_e*mu_a
-    Cd=Cd*Cd_eq
-    sigma_t=transf/Rw
-    
-    
-    
-    ## Regenerative Braking Efficiency ##
-    if B>B_lim/2:
-        nregen=1-(2*B-B_lim)*(2*B-B_lim)/(4*B*B)
-    else:
-        nregen=1
 
+# In[ ]:
+
+def jacobian_th (body,engine,trans,path,driver):
+    """
+    Energy consumption of gasoline vehicles and its analytical Jacobian in a single evaluation.
+    The derivatives are propagated exactly through the model equations (forward mode, see dual.py).
+
+    Parameters:
+    body, engine, trans, path, driver: Parameter groups in the same positional order as EC_th (scalars or arrays).
+
+    Returns:
+    tuple:
+        - EC (array): Energy consumption [L/100km] per configuration.
+        - dEC (array): Shape (38, ...), partial derivatives of EC with respect to each parameter,
+                       in the order of the flattened parameters_th.
+    """
     
-    ### computed parameters for integration model ###
-    K1=K1p*mu_v*mu_v
-    K2=K2p*mu_v*mu_v*mu_v
-    ta=1/PaM*K1
-    da=1/PaM*K2
-    C2=(Tmax)*(mu_a*Tmax)*ta
-    
-    
-    ### integration variables ###
-    
-    J1=1-K1/B*(1-rate_acc*rate_acc)
-    J1a=J1-da*(1-rate_acc*rate_acc)
-    J0=J0p/mu_v*(1-(K1/B-da)*(1-1/rate_acc))
-    J3=mu_v*mu_v*J3p*(1-K1/B*(1-rate_acc*rate_acc)-da*(1-rate_acc*rate_acc))
-    Chi1=sigma_t
-    
-    MIEC = (r0*g+K1*(1-nregen)+g*H)/conv/ne/ntr/n_bat*100
-    r0IEC= (M_tot*g)/conv/ne/ntr/n_bat/1000
-    CdIEC=0.5*rho_air*A*Cd_eq*(J3+w*w)/conv/ne/ntr/n_bat/10
-    AIEC=0.5*rho_air*Cd*(J3+w*w)/conv/ne/ntr/n_bat
-    PeIEC=a_tr*Chi1/conv/ntr/ne/n_bat*100000
-    SIEC=alpha/conv/ne/n_bat+a_tr*P_e/conv/ntr/ne/n_bat
-    PaccIEC=(J0p+t_idle)/conv/ne/n_bat*1000
-    MIEC_SE=MIEC+(P_e/M_tot)*PeIEC*100
-    MIEC_SE_alt=MIEC+(sigma_t/M_tot)*SIEC*100
+    groups=seed([columns(group,names) for group,names in zip([body,engine,trans,path,driver],parameters_th)])
+    EC=evaluate_th(*groups,piec=False)[0]
     
-    return [MIEC,r0IEC,CdIEC,AIEC,PeIEC,SIEC,PaccIEC,MIEC_SE,MIEC_SE_alt]
+    return EC.value,np.broadcast_to(EC.tangent,(EC.tangent.shape[0],)+np.shape(EC.value))
+
+
+def jacobian_el (body,engine,trans,path,driver,battery):
+    """
+    Energy consumption of battery electric vehicles and its analytical Jacobian in a single evaluation.
+    The derivatives are propagated exactly through the model equations (forward mode, see dual.py).
 
+    Parameters:
+    body, engine, trans, path, driver, battery: Parameter groups in the same positional order as EC_el (scalars or arrays).
 
+    Returns:
+    tuple:
+        - EC (array): Energy consumption [kWh/100km] per configuration.
+        - dEC (array): Shape (37, ...), partial derivatives of EC with respect to each parameter,
+                       in the order of the flattened parameters_el.
+    """
+    
+    groups=seed([columns(group,names) for group,names in zip([body,engine,trans,path,driver,battery],parameters_el)])
+    EC=evaluate_el(*groups,piec=False)[0]
+    
+    return EC.value,np.broadcast_to(EC.tangent,(EC.tangent.shape[0],)+np.shape(EC.value))
@@ -1,7 +1,7 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import model
+from matplotlib.figure import Figure
+import consumption
 import input_th
 import input_elec
 import pandas as pd
@@ -26,7 +26,8 @@ colors = ['#2c3e50', '#f1c40f', '#2ecc71', '#e67e22', '#e74c3c', '#1abc9c',
 ### plot coding ###
 
 def comparison_window(title, EC, labels,unit,limit):
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
     sums = EC[0]
     sums = np.round(sums, 2)
     losses = EC[1]
@@ -76,8 +77,7 @@ def fig_interactive (title, EC, labels,unit):
             showlegend=True
         )
 
-    # Affichage
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
             
 
 
@@ -120,11 +120,12 @@ if st.session_state.model_choice == 'ICEV':
     
     else:
         
-        EC = model.EC_th(*st.session_state.parameters_ICEV)
-        fig = comparison_window("Energy Consumption Calculation", EC, labels,unit,limit)
+        EC, PIECs = consumption.energy_consumption('ICEV', st.session_state.parameters_ICEV)
+        fig = consumption.figure('comparison', 'ICEV', st.session_state.parameters_ICEV, lambda: comparison_window("Energy Consumption Calculation", EC, labels,unit,limit))
         st.pyplot(fig)
         
-        fig_interactive ("Energy Consumption Contributions", EC, labels,unit)
+        fig = consumption.figure('interactive', 'ICEV', st.session_state.parameters_ICEV, lambda: fig_interactive ("Energy Consumption Contributions", EC, labels,unit))
+        st.plotly_chart(fig, use_container_width=True)
             
 
         col1,col2=st.columns(2)
@@ -157,7 +158,7 @@ if st.session_state.model_choice == 'ICEV':
                         st.warning('You must select an option to continue')
 
                 else:
-                        PIEC=model.PIEC_th(*st.session_state.parameters_ICEV)[selected_index]
+                        PIEC=PIECs[selected_index]
                         PIEC=np.round(PIEC,2)
                         st.write(f"{selected_P} = {PIEC} kWh/100km/{unit_PIEC[selected_index]}")
                         st.write(f"(i.e., {selected_P} = {np.round(PIEC/8.9,2)} l/100km/{unit_PIEC[selected_index]})")
@@ -183,11 +184,12 @@ if st.session_state.model_choice == 'BEV':
         st.warning('You must select all options to continue')
     
     else:
-            EC = model.EC_el(*st.session_state.parameters_BEV)
-            fig = comparison_window("Energy Consumption Calculation", EC, labels,unit,limit)
+            EC, PIECs = consumption.energy_consumption('BEV', st.session_state.parameters_BEV)
+            fig = consumption.figure('comparison', 'BEV', st.session_state.parameters_BEV, lambda: comparison_window("Energy Consumption Calculation", EC, labels,unit,limit))
             st.pyplot(fig)
             
-            fig_interactive ("Energy Consumption Contributions", EC, labels,unit)
+            fig = consumption.figure('interactive', 'BEV', st.session_state.parameters_BEV, lambda: fig_interactive ("Energy Consumption Contributions", EC, labels,unit))
+            st.plotly_chart(fig, use_container_width=True)
             
             
             col1,col2=st.columns(2)
@@ -219,7 +221,7 @@ if st.session_state.model_choice == 'BEV':
                     if selected_P=='--Select--':
                         st.warning('You must select an option to continue')
                     else:
-                        PIEC=model.PIEC_el(*st.session_state.parameters_BEV)[selected_index]
+                        PIEC=PIECs[selected_index]
                         PIEC=np.round(PIEC,2)
                        
                         st.write(f"{selected_P} = {PIEC} {unit}/{unit_PIEC[selected_index]}")
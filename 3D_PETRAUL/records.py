@@ -0,0 +1,100 @@
+"""Records are named parameter groups accepted by the model in place of positional lists, as scalars or as float64 columns."""
+
+from collections import namedtuple
+import numpy as np
+import model
+
+
+def record(name, fields, doc):
+    """
+    Named tuple class of a parameter group, with constructors for scalar records and struct-of-arrays.
+    Being tuples in the positional order of the group, records are accepted by every model function.
+
+    Parameters:
+    name (str): Class name.
+    fields (list): Parameter names in the positional order of the group (see model.parameters_th and model.parameters_el).
+    doc (str): Class docstring.
+
+    Returns:
+    type: Record class.
+    """
+    base = namedtuple(name, fields)
+
+    class Record(base):
+        __slots__ = ()
+
+        @classmethod
+        def scalar(cls, *args, **kwargs):
+            """
+            Record of one configuration: every parameter converted to a finite float.
+            """
+            values = cls(*args, **kwargs)
+            converted = []
+            for field, value in zip(cls._fields, values):
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError(f"{name}.{field} must be a number, got {value!r}") from None
+                if not np.isfinite(value):
+                    raise ValueError(f"{name}.{field} must be finite, got {value!r}")
+                converted.append(value)
+            return cls._make(converted)
+
+        @classmethod
+        def arrays(cls, *args, **kwargs):
+            """
+            Struct-of-arrays of many configurations: every parameter as a contiguous float64 array, broadcast to a common shape.
+            """
+            values = cls(*args, **kwargs)
+            try:
+                block = np.array(np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in values]))
+            except ValueError as error:
+                raise ValueError(f"{name} parameters do not broadcast together: {error}") from None
+            return cls._make(block)
+
+        @classmethod
+        def stack(cls, records):
+            """
+            Struct-of-arrays from scalar records (or tuples in the positional order of the group), in one float64 block.
+            """
+            block = np.array(records, dtype=float).reshape(-1, len(cls._fields))
+            return cls._make(np.ascontiguousarray(block.T))
+
+        @classmethod
+        def from_frame(cls, frame, scenarios=None):
+            """
+            Struct-of-arrays from a catalogue (parameters as rows in the positional order of the group, configurations as columns).
+
+            Parameters:
+            frame (DataFrame): Catalogue frame (see catalogue.Catalogue).
+            scenarios (list): Configurations kept, in this order (default: all).
+            """
+            if scenarios is not None:
+                frame = frame[list(scenarios)]
+            if len(frame) != len(cls._fields):
+                raise ValueError(f"{name} expects {len(cls._fields)} parameters, the catalogue has {len(frame)} rows")
+            return cls._make(np.ascontiguousarray(frame.to_numpy(dtype=float)))
+
+        def take(self, indices):
+            """
+            Struct-of-arrays of the configurations at the given indices.
+            """
+            return self._make(np.asarray(value)[..., indices] for value in self)
+
+    Record.__name__ = Record.__qualname__ = name
+    Record.__doc__ = doc
+    return Record
+
+
+Body = record('Body', model.parameters_body, "Vehicle body parameters (first group of EC_th and EC_el).")
+ThermalEngine = record('ThermalEngine', model.parameters_th[1], "Gasoline engine parameters (engine group of EC_th).")
+Transmission = record('Transmission', model.parameters_th[2], "Transmission parameters of gasoline vehicles (trans group of EC_th).")
+ElectricMotor = record('ElectricMotor', model.parameters_el[1], "Electric motor parameters (engine group of EC_el).")
+ElectricTransmission = record('ElectricTransmission', model.parameters_el[2], "Transmission parameters of battery electric vehicles (trans group of EC_el).")
+Path = record('Path', model.parameters_path, "Path parameters (path group of EC_th and EC_el).")
+Driver = record('Driver', model.parameters_driver, "Driver parameters (driver group of EC_th and EC_el).")
+Battery = record('Battery', model.parameters_el[5], "Battery parameters (battery group of EC_el).")
+
+# Record classes of each powertrain, in the positional order of the model groups
+records_th = [Body, ThermalEngine, Transmission, Path, Driver]
+records_el = [Body, ElectricMotor, ElectricTransmission, Path, Driver, Battery]
@@ -0,0 +1,95 @@
+"""Scenarios evaluates the Cartesian product of the pre-set configurations in one vectorized pass of the model."""
+
+import os
+import numpy as np
+import pandas as pd
+import model
+import catalogue
+
+
+### Pre-set catalogues ###
+
+folder = os.path.dirname(os.path.abspath(__file__))
+
+contributors = {
+    'ICEV': ['body', 'engine', 'trans', 'path', 'driver'],
+    'BEV': ['body', 'engine', 'trans', 'path', 'driver', 'battery'],
+}
+
+files = {
+    'ICEV': ['body.csv', 'thermal.csv', 'transmission.csv', 'path.csv', 'driver.csv'],
+    'BEV': ['body_EV.csv', 'electric.csv', 'trans_EV.csv', 'path.csv', 'driver.csv', 'battery.csv'],
+}
+
+quantities = {
+    'ICEV': ['EC', 'rolling', 'drag', 'inertia', 'grade', 'wind', 'friction', 'pumping',
+             'thermal', 'accessories', 'transmission', 'synchronization', 'cold_engine',
+             'idling', 'nop_engine', 'nop_transmission', 'nop'],
+    'BEV': ['EC', 'rolling', 'drag', 'inertia', 'grade', 'wind', 'friction', 'copper',
+            'converter', 'accessories', 'transmission', 'battery', 'nop_engine',
+            'nop_transmission', 'nop_battery', 'nop'],
+}
+
+evaluators = {'ICEV': model.EC_th_batch, 'BEV': model.EC_el_batch}
+
+
+def read_catalogue(file_name):
+    """
+    Read a pre-set catalogue (semicolon CSV with one column per configuration).
+
+    Parameters:
+    file_name (str): Path to the CSV file, relative to the PETRAUL folder if not absolute.
+
+    Returns:
+    DataFrame: Parameters as rows and configurations as columns (empty trailing columns removed).
+               The frame is shared through the catalogue cache and must not be modified.
+    """
+    return catalogue.load(os.path.join(folder, file_name)).frame
+
+
+def sweep(powertrain='ICEV', selection=None, catalogues=None):
+    """
+    Evaluate the energy consumption of every combination of pre-set configurations.
+
+    Parameters:
+    powertrain (str): 'ICEV' (gasoline) or 'BEV' (electric).
+    selection (dict): Optional subset of configuration names per contributor,
+                      e.g. {'body': ['Mini', 'SUV'], 'path': ['EU_mix']}. Missing contributors use all configurations.
+    catalogues (dict): Optional catalogue file per contributor replacing the default one,
+                       e.g. {'engine': 'thermal_ecoinvent.csv'}.
+
+    Returns:
+    DataFrame: Tidy long-format table with one row per configuration and quantity:
+               one column per contributor with the configuration name, 'quantity' (EC, losses, nop) and 'value'.
+    """
+    selection = selection or {}
+    catalogues = catalogues or {}
+    names = contributors[powertrain]
+
+    # Parameters and configuration names of each contributor
+    tables = []
+    for name, file_name in zip(names, files[powertrain]):
+        df = read_catalogue(catalogues.get(name, file_name))
+        if name in selection:
+            df = df[list(selection[name])]
+        tables.append(df)
+
+    # Indices of the full factorial design (one row per contributor)
+    shape = [df.shape[1] for df in tables]
+    codes = np.indices(shape).reshape(len(shape), -1)
+
+    # Vectorized evaluation of the model
+    groups = [df.to_numpy(dtype=float)[:, code] for df, code in zip(tables, codes)]
+    EC, losses, nop = evaluators[powertrain](*groups)
+    results = np.concatenate(([EC], losses, nop))
+
+    # Long-format table
+    n_configurations = codes.shape[1]
+    n_quantities = len(quantities[powertrain])
+    table = {}
+    for name, df, code in zip(names, tables, codes):
+        table[name] = pd.Categorical.from_codes(np.tile(code, n_quantities), categories=df.columns)
+    table['quantity'] = pd.Categorical.from_codes(np.repeat(np.arange(n_quantities), n_configurations), categories=quantities[powertrain])
+    table['value'] = results.ravel()
+
+    return pd.DataFrame(table)
@@ -0,0 +1,194 @@
+"""Sensitivity computes global sensitivity indices (Sobol and Morris) of the energy consumption and its losses."""
+
+import numpy as np
+import pandas as pd
+import scenarios
+import uncertainty
+
+
+# Efficiencies, kept below 1 when varied around their base value
+efficiencies = ['ne', 'ntr', 'n_bat']
+
+
+def catalogue_bounds(powertrain, base, margin=0.1, catalogues=None):
+    """
+    Ranges of the model parameters around a configuration: each parameter is varied by +/- margin around its base value,
+    without leaving the range spanned by the pre-set configurations (efficiencies staying at most 1).
+    Parameters with a single value in the catalogues are varied by +/- margin around it.
+    Varying every parameter independently over the whole catalogues would combine e.g. the motor of a pick-up with the
+    mass of a mini car and the accelerations of an aggressive driver, giving non-physical (negative) consumptions.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    base (dict): Value of every model parameter (see uncertainty.configuration).
+    margin (float): Relative variation of the parameters around their base value.
+    catalogues (dict): Optional catalogue file per contributor replacing the default one.
+
+    Returns:
+    dict: (low, high) keyed by parameter name (parameters equal to zero in the base configuration are left out).
+    """
+    catalogues = catalogues or {}
+    bounds = {}
+    for contributor, file_name, labels in zip(scenarios.contributors[powertrain], scenarios.files[powertrain], uncertainty.parameters[powertrain]):
+        values = scenarios.read_catalogue(catalogues.get(contributor, file_name)).to_numpy(dtype=float)
+        for label, minimum, maximum in zip(labels, values.min(axis=1), values.max(axis=1)):
+            low, high = sorted([base[label] * (1 - margin), base[label] * (1 + margin)])
+            if minimum < maximum:
+                low, high = max(low, minimum), min(high, maximum)
+            if label in efficiencies:
+                high = min(high, 1.0)
+            if low < high:
+                bounds[label] = (float(low), float(high))
+    return bounds
+
+
+def outputs(powertrain, base, bounds, X, chunk_size=10**5):
+    """
+    Evaluate EC and the losses for normalized samples of the parameters.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    base (dict): Value of every model parameter (see uncertainty.configuration).
+    bounds (dict): (low, high) of the varied parameters, in the column order of X.
+    X (array): Shape (n, k), samples in [0, 1] of the k varied parameters.
+    chunk_size (int): Number of samples evaluated at once.
+
+    Returns:
+    array: Shape (n_quantities, n), EC followed by the losses.
+
+    Raises:
+    ValueError: If a sample gives a non-positive EC or non-finite losses (bounds outside the validity of the model).
+    """
+    low = np.array([bound[0] for bound in bounds.values()])
+    high = np.array([bound[1] for bound in bounds.values()])
+    n_losses = len([q for q in scenarios.quantities[powertrain] if not q.startswith('nop')]) - 1
+    Y = np.empty((n_losses + 1, len(X)))
+    for start in range(0, len(X), chunk_size):
+        values = low + X[start:start + chunk_size] * (high - low)
+        samples = dict(zip(bounds, values.T))
+        EC, losses, nop = uncertainty.evaluate(powertrain, base, samples)
+        invalid = ~((EC > 0) & np.all(np.isfinite(losses), axis=0))
+        if np.any(invalid):
+            sample = {label: float(value[np.argmax(invalid)]) for label, value in samples.items()}
+            raise ValueError(f"{np.count_nonzero(invalid)} samples give a non-positive EC or non-finite losses, e.g. {sample}; narrow the bounds.")
+        Y[0, start:start + chunk_size] = EC
+        Y[1:, start:start + chunk_size] = losses
+    return Y
+
+
+def saltelli(function, k, n, rng):
+    """
+    First-order and total Sobol indices of a function of k independent uniform inputs on [0, 1].
+    The indices are estimated with the Saltelli (2010) first-order and Jansen total-effect estimators (n*(k+2) evaluations),
+    the outputs being centred in the first-order estimator to reduce its variance when the mean is large.
+
+    Parameters:
+    function (callable): Maps samples of shape (n, k) to outputs of shape (n_outputs, n).
+    k (int): Number of inputs.
+    n (int): Number of base samples.
+    rng (Generator): NumPy random generator.
+
+    Returns:
+    tuple: First-order and total indices, arrays of shape (k, n_outputs).
+    """
+    A = rng.random((n, k))
+    B = rng.random((n, k))
+
+    Y_A = function(A)
+    Y_B = function(B)
+    mean = np.mean(np.concatenate((Y_A, Y_B), axis=1), axis=1, keepdims=True)
+    variance = np.var(np.concatenate((Y_A, Y_B), axis=1), axis=1)
+
+    first_order = np.empty((k, len(Y_A)))
+    total = np.empty((k, len(Y_A)))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i in range(k):
+            # A with its i-th column taken from B
+            AB = A.copy()
+            AB[:, i] = B[:, i]
+            Y_AB = function(AB)
+            first_order[i] = np.mean((Y_B - mean) * (Y_AB - Y_A), axis=1) / variance
+            total[i] = 0.5 * np.mean((Y_A - Y_AB) ** 2, axis=1) / variance
+    return first_order, total
+
+
+def sobol(powertrain, base, bounds, n=2**13, seed=None, chunk_size=10**5):
+    """
+    First-order and total Sobol indices with the Saltelli sampling design (n*(k+2) model evaluations, see saltelli).
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    base (dict): Value of every model parameter (see uncertainty.configuration).
+    bounds (dict): (low, high) of the k varied parameters (uniform distributions, see catalogue_bounds).
+    n (int): Number of base samples.
+    seed (int): Seed of the random generator.
+    chunk_size (int): Number of samples evaluated at once.
+
+    Returns:
+    tuple:
+        - first_order (DataFrame): First-order indices, parameters as rows, EC and losses as columns.
+        - total (DataFrame): Total indices, same layout.
+    """
+    first_order, total = saltelli(lambda X: outputs(powertrain, base, bounds, X, chunk_size), len(bounds), n, np.random.default_rng(seed))
+    quantities = [q for q in scenarios.quantities[powertrain] if not q.startswith('nop')]
+    return pd.DataFrame(first_order, index=list(bounds), columns=quantities), pd.DataFrame(total, index=list(bounds), columns=quantities)
+
+
+def elementary_effects(function, k, r, levels, rng):
+    """
+    Morris elementary effects of a function of k inputs on [0, 1], with r one-at-a-time trajectories (r*(k+1) evaluations).
+
+    Parameters:
+    function (callable): Maps samples of shape (n, k) to outputs of shape (n_outputs, n).
+    k (int): Number of inputs.
+    r (int): Number of trajectories.
+    levels (int): Number of levels of the sampling grid.
+    rng (Generator): NumPy random generator.
+
+    Returns:
+    tuple: Mean absolute value and standard deviation of the elementary effects, arrays of shape (k, n_outputs).
+    """
+    delta = levels / (2 * (levels - 1))
+
+    # Starting points on the grid and order in which the parameters are moved
+    start = rng.integers(0, levels, (r, k)) / (levels - 1)
+    step = np.where(start + delta <= 1, delta, -delta)
+    order = np.argsort(rng.random((r, k)), axis=1)
+
+    # Trajectories: point j+1 moves parameter order[:, j] by one step from point j
+    moves = np.zeros((r, k, k))
+    rows = np.arange(r)[:, None]
+    moves[rows, np.arange(k), order] = step[rows, order]
+    trajectories = start[:, None, :] + np.concatenate((np.zeros((r, 1, k)), np.cumsum(moves, axis=1)), axis=1)
+
+    Y = function(trajectories.reshape(-1, k)).reshape(-1, r, k + 1)
+
+    # Elementary effects, re-ordered by parameter
+    effects = np.diff(Y, axis=2) / step[rows, order]
+    effects_sorted = np.empty_like(effects)
+    effects_sorted[:, rows, order] = effects
+    return np.mean(np.abs(effects_sorted), axis=1).T, np.std(effects_sorted, axis=1).T
+
+
+def morris(powertrain, base, bounds, r=100, levels=4, seed=None, chunk_size=10**5):
+    """
+    Morris elementary effects screening with r one-at-a-time trajectories (r*(k+1) model evaluations, see elementary_effects).
+    Elementary effects are expressed per unit of the normalized parameter range.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    base (dict): Value of every model parameter (see uncertainty.configuration).
+    bounds (dict): (low, high) of the k varied parameters (see catalogue_bounds).
+    r (int): Number of trajectories.
+    levels (int): Number of levels of the sampling grid.
+    seed (int): Seed of the random generator.
+    chunk_size (int): Number of samples evaluated at once.
+
+    Returns:
+    tuple:
+        - mu_star (DataFrame): Mean absolute elementary effects, parameters as rows, EC and losses as columns.
+        - sigma (DataFrame): Standard deviation of the elementary effects, same layout.
+    """
+    mu_star, sigma = elementary_effects(lambda X: outputs(powertrain, base, bounds, X, chunk_size), len(bounds), r, levels, np.random.default_rng(seed))
+    quantities = [q for q in scenarios.quantities[powertrain] if not q.startswith('nop')]
+    return pd.DataFrame(mu_star, index=list(bounds), columns=quantities), pd.DataFrame(sigma, index=list(bounds), columns=quantities)
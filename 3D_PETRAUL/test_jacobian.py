@@ -0,0 +1,74 @@
+"""Checks of the analytical Jacobians of model.py against central finite differences."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import model
+
+folder = os.path.dirname(os.path.abspath(__file__))
+
+
+def configurations(files, n):
+    """
+    Parameter groups of the first n configurations of each catalogue, as arrays of shape (n,).
+    """
+    groups = []
+    for file_name in files:
+        frame = pd.read_csv(os.path.join(folder, file_name), index_col=0, sep=';', encoding='utf-8-sig').dropna(axis=1, how='all')
+        values = frame.to_numpy(dtype=float)
+        groups.append([values[k, np.arange(n) % values.shape[1]] for k in range(len(values))])
+    return groups
+
+
+def finite_differences(batch, groups, step=1e-6):
+    """
+    Central finite differences of the EC with respect to every parameter, shape (P, ...).
+    """
+    derivatives = []
+    for g, group in enumerate(groups):
+        for k, column in enumerate(group):
+            h = step * np.maximum(np.abs(column), 1)
+            shifted = []
+            for sign in (1, -1):
+                changed = [list(other) for other in groups]
+                changed[g][k] = column + sign * h
+                shifted.append(batch(*changed)[0])
+            derivatives.append((shifted[0] - shifted[1]) / (2 * h))
+    return np.array(np.broadcast_arrays(*derivatives))
+
+
+def mixed(groups, arrays):
+    """
+    Keep the groups listed in arrays as arrays and reduce the other groups to the scalars of the first configuration.
+    """
+    return [group if g in arrays else [float(np.ravel(column)[0]) for column in group] for g, group in enumerate(groups)]
+
+
+files_th = ['body.csv', 'thermal.csv', 'transmission.csv', 'path.csv', 'driver.csv']
+files_el = ['body_EV.csv', 'electric.csv', 'trans_EV.csv', 'path.csv', 'driver.csv', 'battery.csv']
+
+
+@pytest.mark.parametrize('n, arrays', [(5, {3}), (38, {3}), (5, {0, 4}), (5, set())])
+def test_jacobian_th_mixed(n, arrays):
+    groups = mixed(configurations(files_th, n), arrays)
+    EC, dEC = model.jacobian_th(*groups)
+    assert dEC.shape == (38,) + np.shape(EC)
+    np.testing.assert_allclose(EC, model.EC_th_batch(*groups)[0])
+    np.testing.assert_allclose(dEC, finite_differences(model.EC_th_batch, groups), rtol=1e-4, atol=1e-8)
+
+
+@pytest.mark.parametrize('n, arrays', [(5, {3}), (37, {3}), (5, {1, 5}), (5, set())])
+def test_jacobian_el_mixed(n, arrays):
+    groups = mixed(configurations(files_el, n), arrays)
+    EC, dEC = model.jacobian_el(*groups)
+    assert dEC.shape == (37,) + np.shape(EC)
+    np.testing.assert_allclose(EC, model.EC_el_batch(*groups)[0])
+    np.testing.assert_allclose(dEC, finite_differences(model.EC_el_batch, groups), rtol=1e-4, atol=1e-8)
+
+
+def test_jacobian_th_scalar_column_matches_all_scalar():
+    groups = configurations(files_th, 38)
+    scalar = mixed(groups, set())
+    dEC = model.jacobian_th(*mixed(groups, {3}))[1]
+    np.testing.assert_allclose(dEC[:, 0], model.jacobian_th(*scalar)[1])
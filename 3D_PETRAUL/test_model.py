@@ -0,0 +1,252 @@
+"""Checks of the parameter groups accepted by model.columns and of the modules built on model.py."""
+
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+import catalogue
+import consumption
+import model
+import scenarios
+import uncertainty
+import records
+from records import Body
+
+values = np.arange(1.0, 21.0).reshape(len(model.parameters_body), 2)
+
+
+def test_columns_named_groups():
+    frame = pd.DataFrame(values.T, columns=model.parameters_body)
+    structured = np.rec.fromarrays(values, names=model.parameters_body)
+    for group in (frame, structured, Body.from_frame(pd.DataFrame(values)), values, list(values)):
+        np.testing.assert_array_equal(model.columns(group, model.parameters_body), values)
+
+
+@pytest.mark.parametrize('names', [model.parameters_body[::-1], model.parameters_body[:-1] + ['C_d_eq']])
+def test_columns_wrong_names(names):
+    with pytest.raises(ValueError, match='expected'):
+        model.columns(pd.DataFrame(values.T, columns=names), model.parameters_body)
+    with pytest.raises(ValueError, match='expected'):
+        model.columns(np.rec.fromarrays(values, names=names), model.parameters_body)
+
+
+def test_sweep_selection():
+    selection = {'body': ['Mini', 'SUV'], 'path': ['EU_mix'], 'driver': ['Average_EU', 'Ecodriver', 'Aggres.']}
+    table = scenarios.sweep('ICEV', selection)
+    n_configurations = 2 * 6 * 8 * 1 * 3
+    assert len(table) == n_configurations * len(scenarios.quantities['ICEV'])
+    assert list(table['body'].cat.categories) == ['Mini', 'SUV'] and list(table['path'].unique()) == ['EU_mix']
+
+    # One configuration against a direct evaluation
+    names = ['SUV', 'Large_EU', 'Auto - AWD', 'EU_mix', 'Aggres.']
+    rows = table[(table[scenarios.contributors['ICEV']] == names).all(axis=1)]
+    base = uncertainty.configuration('ICEV', names)
+    EC, losses, nop = model.EC_th_batch(*[[base[label] for label in labels] for labels in model.parameters_th])
+    np.testing.assert_allclose(rows['value'], np.concatenate(([EC], losses, nop)))
+    assert list(rows['quantity']) == scenarios.quantities['ICEV']
+
+
+def test_sweep_catalogues():
+    # A replacement catalogue brings its own configurations
+    table = scenarios.sweep('ICEV', {'body': ['Compact'], 'path': ['EU_mix'], 'trans': ['Average_EU'], 'driver': ['Average_EU']},
+                            catalogues={'engine': 'thermal_ecoinvent.csv'})
+    EC = table[table['quantity'] == 'EC'].set_index('engine')['value']
+    assert list(EC.index) == list(scenarios.read_catalogue('thermal_ecoinvent.csv').columns)
+    default = scenarios.sweep('ICEV', {'body': ['Compact'], 'path': ['EU_mix'], 'trans': ['Average_EU'], 'driver': ['Average_EU']})
+    default = default[default['quantity'] == 'EC'].set_index('engine')['value']
+    np.testing.assert_allclose(EC[default.index], default)
+    assert EC['Small_min'] != EC['Small_max']
+    with pytest.raises(KeyError):
+        scenarios.sweep('BEV', {'body': ['Unknown']})
+
+
+def test_catalogue_load(tmp_path):
+    file_name = tmp_path / 'body.csv'
+    file_name.write_text('Parameter;A;B\nM_body [kg];1000;1500\nCd [];0.3;0.35\n', encoding='utf-8-sig')
+    shared = catalogue.load(file_name)
+    assert catalogue.load(str(file_name)) is shared
+    assert shared.scenarios == {'A': (1000.0, 0.3), 'B': (1500.0, 0.35)}
+    with pytest.raises(TypeError):
+        shared.scenarios['C'] = (1200.0, 0.32)
+
+    # A modified file is parsed again
+    file_name.write_text('Parameter;A\nM_body [kg];1100\nCd [];0.3\n', encoding='utf-8-sig')
+    stat = file_name.stat()
+    os.utime(file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    modified = catalogue.load(file_name)
+    assert modified is not shared and modified.scenarios == {'A': (1100.0, 0.3)}
+    assert catalogue.load(file_name) is modified
+
+
+def test_catalogue_overlay():
+    file_name = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'body.csv')
+    first, second = catalogue.overlay(file_name), catalogue.overlay(file_name)
+    shared = catalogue.load(file_name).scenarios
+    first['Custom'] = (1.0,) * 10
+    first['Mini'] = (2.0,) * 10
+    assert first['Mini'] == (2.0,) * 10 and 'Custom' in first
+    assert 'Custom' not in second and 'Custom' not in shared
+    assert second['Mini'] == shared['Mini'] != first['Mini']
+    del first['Mini']
+    assert first['Mini'] == shared['Mini']
+
+
+def test_consumption_key(monkeypatch):
+    base = uncertainty.configuration('ICEV', ['Compact', 'Average_EU', 'Average_EU', 'EU_mix', 'Average_EU'])
+    parameters = [[base[label] for label in labels] for labels in model.parameters_th]
+    # Equal values give equal keys whatever the container and number type
+    same = [np.array(group, dtype=np.float64) for group in parameters]
+    assert consumption.key('ICEV', same) == consumption.key('ICEV', parameters)
+    assert hash(consumption.key('ICEV', same)) == hash(consumption.key('ICEV', parameters))
+    assert consumption.key('BEV', parameters) != consumption.key('ICEV', parameters)
+    changed = [list(group) for group in parameters]
+    changed[0][0] += 1
+    assert consumption.key('ICEV', changed) != consumption.key('ICEV', parameters)
+
+    calls = []
+    def evaluate(*groups):
+        calls.append(groups)
+        return model.evaluate_th(*groups)
+    monkeypatch.setattr(consumption, 'results', consumption.LRUCache(2))
+    monkeypatch.setitem(consumption.evaluators, 'ICEV', evaluate)
+    first = consumption.energy_consumption('ICEV', parameters)
+    assert consumption.energy_consumption('ICEV', same) is first and len(calls) == 1
+    assert consumption.energy_consumption('ICEV', changed) is not first and len(calls) == 2
+    EC, losses, nop, PIECs = model.evaluate_th(*parameters)
+    assert first == ([float(EC), losses.tolist(), nop.tolist()], tuple(PIECs.tolist()))
+
+    # The least recently used configuration is evicted
+    consumption.energy_consumption('ICEV', parameters)
+    changed[0][0] += 1
+    consumption.energy_consumption('ICEV', changed)
+    consumption.energy_consumption('ICEV', parameters)
+    assert len(calls) == 3
+    changed[0][0] -= 1
+    consumption.energy_consumption('ICEV', changed)
+    assert len(calls) == 4
+
+
+def test_records_from_frame():
+    frames = [catalogue.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name)).frame for file_name in scenarios.files['ICEV']]
+    names = ['SUV', 'Large_EU', 'Auto - AWD', 'EU_mix', 'Aggres.']
+    groups = [cls.from_frame(frame) for cls, frame in zip(records.records_th, frames)]
+    for cls, frame, group in zip(records.records_th, frames, groups):
+        assert type(group) is cls and len(group) == len(frame)
+        assert all(value.dtype == np.float64 and value.flags['C_CONTIGUOUS'] for value in group)
+        np.testing.assert_array_equal(group, frame.to_numpy(dtype=float))
+
+    # Selected configurations, in the given order
+    selected = Body.from_frame(frames[0], ['SUV', 'Mini'])
+    np.testing.assert_array_equal(selected, frames[0][['SUV', 'Mini']].to_numpy(dtype=float))
+    with pytest.raises(KeyError):
+        Body.from_frame(frames[0], ['Unknown'])
+    with pytest.raises(ValueError, match='Body expects 10 parameters'):
+        Body.from_frame(frames[0].iloc[1:])
+
+    # take and stack give the same block as the selected configurations
+    index = [list(frame.columns).index(name) for frame, name in zip(frames, names)]
+    taken = [group.take([i]) for group, i in zip(groups, index)]
+    scalars = [cls.scalar(*frame[name]) for cls, frame, name in zip(records.records_th, frames, names)]
+    for cls, group, scalar in zip(records.records_th, taken, scalars):
+        np.testing.assert_array_equal(cls.stack([scalar]), group)
+        assert type(cls.stack([scalar])) is cls
+    np.testing.assert_array_equal(Body.stack([scalars[0], scalars[0]._replace(M_body=1.0)]).M_body, [scalars[0].M_body, 1.0])
+    assert groups[0].take(0).M_body == frames[0].iloc[0, 0]
+    np.testing.assert_allclose(model.EC_th_batch(*taken)[0], [model.EC_th(*scalars)[0]])
+
+
+def test_records_validation():
+    with pytest.raises(ValueError, match='Body.Cd must be a number'):
+        Body.scalar(*range(2), 'high', *range(7))
+    with pytest.raises(ValueError, match='Body.A must be finite'):
+        Body.scalar(*range(3), np.nan, *range(6))
+    with pytest.raises(TypeError):
+        Body.scalar(*range(9))
+    with pytest.raises(ValueError, match='do not broadcast'):
+        Body.arrays(*[np.ones(2)] * 9, np.ones(3))
+    block = Body.arrays(*[np.ones(2)] * 9, 1.0)
+    assert np.shape(block) == (10, 2) and block.Cd_eq.tolist() == [1.0, 1.0]
+
+
+def rewrite(file_name, edit):
+    """
+    Replace the content of a file by edit(content), with a later modification time.
+    """
+    with open(file_name, 'rb') as file:
+        content = file.read()
+    with open(file_name, 'wb') as file:
+        file.write(edit(content))
+    stat = os.stat(file_name)
+    os.utime(file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_catalogue_bundle(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogue, 'bundles', {})
+    files = [str(tmp_path / file_name) for file_name in ('body.csv', 'thermal.csv', 'transmission.csv')]
+    for file_name in files:
+        shutil.copy(os.path.join(catalogue.folder, os.path.basename(file_name)), file_name)
+    bundle = str(tmp_path / 'catalogues.bin')
+    assert catalogue.compile_bundle(files, bundle) == ['body.csv', 'thermal.csv', 'transmission.csv']
+
+    blocks = catalogue.open_bundle(bundle)
+    for file_name in files:
+        name = os.path.basename(file_name)
+        parsed = catalogue.parse(file_name)
+        assert blocks[name].parameters == catalogue.groups[name]
+        assert blocks[name].units == [catalogue.model_units[parameter] for parameter in catalogue.groups[name]]
+        assert blocks[name].labels == list(parsed.frame.index) and blocks[name].scenarios == list(parsed.frame.columns)
+        assert not blocks[name].values.flags.writeable
+
+        # Values as in the CSV file (no unit conversion), trailing empty columns left out
+        mapped = catalogue.from_bundle(file_name, bundle)
+        pd.testing.assert_frame_equal(mapped.frame, parsed.frame)
+        assert mapped.scenarios == parsed.scenarios
+    assert blocks['thermal.csv'].units[blocks['thermal.csv'].parameters.index('N_idle')] == 'rpm'
+
+    # CSV files outside the folder of the bundle, modified or not compiled are parsed
+    assert catalogue.from_bundle(os.path.join(catalogue.folder, 'body.csv'), bundle) is None
+    shutil.copy(os.path.join(catalogue.folder, 'driver.csv'), tmp_path)
+    assert catalogue.from_bundle(str(tmp_path / 'driver.csv'), bundle) is None
+    rewrite(files[0], lambda content: content + b'\n')
+    assert catalogue.from_bundle(files[0], bundle) is None
+    assert catalogue.from_bundle(files[1], bundle) is not None
+
+
+@pytest.mark.parametrize('edit, message', [
+    (lambda content: content[:-3], 'multiple'),
+    (lambda content: content[:-8 * 40], 'reshape'),
+    (lambda content: b'NOTABUN\0' + content[8:], 'not a catalogue bundle'),
+    (lambda content: content.replace(b'"version": 1', b'"version": 0', 1), 'recompile'),
+    (lambda content: content.replace(b'"catalogues"', b'"catalogues\0', 1), 'Ignored'),
+])
+def test_catalogue_bundle_corrupt(tmp_path, monkeypatch, edit, message):
+    monkeypatch.setattr(catalogue, 'bundles', {})
+    file_name = str(tmp_path / 'thermal.csv')
+    shutil.copy(os.path.join(catalogue.folder, 'thermal.csv'), file_name)
+    bundle = str(tmp_path / 'catalogues.bin')
+    catalogue.compile_bundle([file_name], bundle)
+    assert catalogue.from_bundle(file_name, bundle) is not None
+
+    # A truncated (misaligned), foreign, outdated or unreadable bundle is ignored with a warning
+    rewrite(bundle, edit)
+    with pytest.warns(UserWarning, match=message):
+        assert catalogue.from_bundle(file_name, bundle) is None
+    pd.testing.assert_frame_equal(catalogue.load(file_name).frame, catalogue.parse(file_name).frame)
+
+
+def test_EC_th_scalar_types():
+    base = uncertainty.configuration('ICEV', ['Compact', 'Average_EU', 'Average_EU', 'EU_mix', 'Average_EU'])
+    EC, losses, nop = model.EC_th(*[[base[label] for label in labels] for labels in model.parameters_th])
+    assert type(EC) is np.float64 and EC == pytest.approx(6.156146984928208, rel=1e-12)
+    assert type(losses) is list and len(losses) == 13 and all(type(value) is np.float64 for value in losses)
+    assert type(nop) is list and len(nop) == 3 and all(type(value) is np.float64 for value in nop)
+
+
+def test_EC_el_scalar_types():
+    names = [list(scenarios.read_catalogue(file_name).columns)[0] for file_name in scenarios.files['BEV']]
+    base = uncertainty.configuration('BEV', names)
+    EC, losses, nop = model.EC_el(*[[base[label] for label in labels] for labels in model.parameters_el])
+    assert type(EC) is np.float64 and EC == pytest.approx(18.091722816223943, rel=1e-12)
+    assert type(losses) is list and len(losses) == 11 and all(type(value) is np.float64 for value in losses)
+    assert type(nop) is list and len(nop) == 4 and all(type(value) is np.float64 for value in nop)
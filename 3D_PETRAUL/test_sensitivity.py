@@ -0,0 +1,68 @@
+"""Checks of the Sobol and Morris estimators of sensitivity.py on analytic functions and on the default designs."""
+
+import numpy as np
+import pytest
+import scenarios
+import sensitivity
+import uncertainty
+
+designs = {
+    'ICEV': ['Average_EU', 'Average_EU', 'Average_EU', 'EU_mix', 'Average_EU'],
+    'BEV': ['Average_EU', 'Average_EU', 'Average_EU', 'EU_mix', 'Average_EU', 'Average'],
+}
+
+
+def ishigami(X, a=7, b=0.1):
+    """
+    Ishigami function of three inputs uniform on [-pi, pi], given as samples in [0, 1].
+    """
+    x = np.pi * (2 * X - 1)
+    return (np.sin(x[:, 0]) + a * np.sin(x[:, 1]) ** 2 + b * x[:, 2] ** 4 * np.sin(x[:, 0]))[None]
+
+
+def test_saltelli_ishigami():
+    # Analytical indices for a=7, b=0.1
+    first_order, total = sensitivity.saltelli(ishigami, 3, 2**15, np.random.default_rng(0))
+    np.testing.assert_allclose(first_order[:, 0], [0.3139, 0.4424, 0.0], atol=0.02)
+    np.testing.assert_allclose(total[:, 0], [0.5576, 0.4424, 0.2437], atol=0.02)
+
+
+def test_elementary_effects_linear():
+    # Elementary effects of a linear function are its slopes, whatever the trajectories
+    slopes = np.array([3.0, -2.0, 0.5, 0.0])
+    mu_star, sigma = sensitivity.elementary_effects(lambda X: (X @ slopes)[None], 4, 20, 4, np.random.default_rng(0))
+    np.testing.assert_allclose(mu_star[:, 0], np.abs(slopes))
+    np.testing.assert_allclose(sigma[:, 0], 0, atol=1e-12)
+
+
+def test_elementary_effects_ishigami():
+    # x3 only acts through its interaction with x1: large spread of its effects
+    mu_star, sigma = sensitivity.elementary_effects(ishigami, 3, 1000, 4, np.random.default_rng(0))
+    assert np.all(mu_star[:, 0] > 1)
+    assert sigma[2, 0] > mu_star[2, 0]
+
+
+@pytest.mark.parametrize('powertrain', ['ICEV', 'BEV'])
+def test_default_design(powertrain):
+    base = uncertainty.configuration(powertrain, designs[powertrain])
+    bounds = sensitivity.catalogue_bounds(powertrain, base)
+    assert all(bounds[name][1] <= 1 for name in sensitivity.efficiencies if name in bounds)
+    X = np.random.default_rng(0).random((10**4, len(bounds)))
+    Y = sensitivity.outputs(powertrain, base, bounds, X)
+    assert np.all(np.isfinite(Y)) and np.all(Y[0] > 0)
+
+    first_order, total = sensitivity.sobol(powertrain, base, bounds, n=2**10, seed=0)
+    assert list(first_order.columns) == [q for q in scenarios.quantities[powertrain] if not q.startswith('nop')]
+    assert 0.8 < total['EC'].sum() < 1.5
+    assert np.all(first_order['EC'] < total['EC'] + 0.05)
+
+
+def test_non_physical_samples():
+    # Full catalogue ranges combine e.g. the largest motor with the lightest body
+    base = uncertainty.configuration('BEV', designs['BEV'])
+    bounds = {}
+    for file_name, labels in zip(scenarios.files['BEV'], uncertainty.parameters['BEV']):
+        values = scenarios.read_catalogue(file_name).to_numpy(dtype=float)
+        bounds.update((label, (low, high)) for label, low, high in zip(labels, values.min(axis=1), values.max(axis=1)) if low < high)
+    with pytest.raises(ValueError, match='non-positive EC'):
+        sensitivity.outputs('BEV', base, bounds, np.random.default_rng(0).random((10**4, len(bounds))))
@@ -0,0 +1,77 @@
+"""Checks of the second-by-second simulation of simulation.py against the analytical model of model.py."""
+
+import os
+import sys
+import numpy as np
+import pytest
+import model
+import simulation
+import uncertainty
+
+folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(folder, '..', '3B_cycles'))
+import cycle_preparation as cp
+
+# EU_mix holds the path parameters of WLTP
+designs = {
+    'ICEV': ['Compact', 'Average_EU', 'Average_EU', 'EU_mix', 'Average_EU'],
+    'BEV': ['Compact', 'Average_EU', 'Average_EU', 'EU_mix', 'Average_EU', 'Average'],
+}
+forwards = {'ICEV': simulation.forward_th, 'BEV': simulation.forward_el}
+evaluators = {'ICEV': model.evaluate_th, 'BEV': model.evaluate_el}
+
+speed = np.array(cp.cycle_opening(os.path.join(folder, '..', '3B_cycles', 'wltp.csv')), dtype=float)
+
+
+def groups(powertrain):
+    base = uncertainty.configuration(powertrain, designs[powertrain])
+    return [[base[label] for label in labels] for labels in uncertainty.parameters[powertrain]]
+
+
+@pytest.mark.parametrize('powertrain, tolerance', [('ICEV', 0.15), ('BEV', 0.03)])
+def test_forward_wltp_against_analytical(powertrain, tolerance):
+    # Remaining modelling differences are listed in the docstring of simulation.py (ICEV about +12%, BEV about +2%)
+    EC, trace = forwards[powertrain](*groups(powertrain), speed)
+    assert EC == pytest.approx(evaluators[powertrain](*groups(powertrain), piec=False)[0], rel=tolerance)
+
+
+def test_forward_th_wheels():
+    # The gap of the ICEV comes from the engine losses: the traction energy matches the external force terms
+    body, engine, trans, path, driver = groups('ICEV')
+    EC, trace = simulation.forward_th(body, engine, trans, path, driver, speed)
+    distance = np.sum(simulation.trace_kinematics(speed * driver[1])[2])
+    wheels = np.sum(np.maximum(trace['power'], 0)) / distance / (model.fuel * 10) / engine[1] / trans[0]
+    losses = model.evaluate_th(body, engine, trans, path, driver, piec=False)[1]
+    assert wheels == pytest.approx(np.sum(losses[:5]), rel=0.03)
+
+
+def test_forward_el_recovery():
+    # The battery gets back at most the braking power at the wheels times the regenerative and drivetrain efficiencies
+    body, engine, trans, path, driver, battery = groups('BEV')
+    EC, trace = simulation.forward_el(body, engine, trans, path, driver, battery, speed)
+    B = driver[0]
+    nregen = 1 - (2 * B - model.B_lim) ** 2 / (4 * B * B) if B > model.B_lim / 2 else 1
+    charging = trace['battery_power'] < 0
+    assert np.any(charging)
+    assert np.all(-trace['battery_power'][charging] <= -trace['power'][charging] * nregen * trans[1] * engine[2])
+
+
+@pytest.mark.parametrize('powertrain', ['ICEV', 'BEV'])
+def test_forward_chunks(powertrain):
+    parameters = groups(powertrain)
+    parameters[0][0] = np.linspace(900, 2000, 7)
+    EC, trace = forwards[powertrain](*parameters, speed)
+    assert EC.shape == (7,) and trace['power'].shape == (7, len(speed) - 1)
+    for chunk_size in (1, 3, 100):
+        chunked, none = forwards[powertrain](*parameters, speed, trace=False, chunk_size=chunk_size)
+        assert none is None
+        np.testing.assert_allclose(chunked, EC, rtol=1e-12)
+
+    # Vehicles and traces broadcast together
+    parameters[0][0] = parameters[0][0][:6].reshape(2, 3)
+    traces = np.stack([speed, 0.9 * speed])[:, None, :]
+    EC, trace = forwards[powertrain](*parameters, traces, chunk_size=4)
+    assert EC.shape == (2, 3) and trace['torque'].shape == (2, 3, len(speed) - 1)
+    single = groups(powertrain)
+    single[0][0] = parameters[0][0][1, 2]
+    assert EC[1, 2] == pytest.approx(forwards[powertrain](*single, 0.9 * speed)[0], rel=1e-12)
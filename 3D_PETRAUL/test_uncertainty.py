@@ -0,0 +1,54 @@
+"""Checks of the Monte Carlo propagation of uncertainty.py against a direct evaluation of the samples."""
+
+import numpy as np
+import pytest
+import uncertainty
+
+base = uncertainty.configuration('ICEV', ['Average_EU', 'Average_EU', 'Average_EU', 'EU_mix', 'Average_EU'])
+distributions = {'M_body': ('uniform', 1300, 1700), 'ne': ('normal', 0.427, 0.02), 'K1p': ('triangular', 0.1, 0.14, 0.2)}
+percentiles = (2.5, 25, 50, 75, 97.5)
+
+
+def direct(n, chunk_size, seed):
+    """
+    EC and losses of the samples drawn by monte_carlo, shape (n_quantities, n).
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+        samples = {name: uncertainty.draw(distribution, size, rng) for name, distribution in distributions.items()}
+        EC, losses, nop = uncertainty.evaluate('ICEV', base, samples)
+        results.append(np.concatenate(([EC], losses)))
+    return np.concatenate(results, axis=1)
+
+
+def test_monte_carlo_one_chunk():
+    table = uncertainty.monte_carlo('ICEV', base, distributions, n=5000, chunk_size=5000, percentiles=percentiles, seed=0)
+    results = direct(5000, 5000, 0)
+    np.testing.assert_allclose(table['mean'], results.mean(axis=1), rtol=1e-12)
+    np.testing.assert_allclose(table.iloc[:, 1:], np.percentile(results, percentiles, axis=1).T, rtol=1e-12)
+
+
+@pytest.mark.parametrize('chunk_size', [100, 1000, 3000])
+def test_monte_carlo_histograms(chunk_size):
+    bins = 2**10
+    table = uncertainty.monte_carlo('ICEV', base, distributions, n=20000, chunk_size=chunk_size, percentiles=percentiles, seed=0, bins=bins)
+    results = direct(20000, chunk_size, 0)
+    np.testing.assert_allclose(table['mean'], results.mean(axis=1), rtol=1e-12)
+    # Within a few bin widths (the range of a histogram is at most 4 times the range of the samples, constant losses aside)
+    expected = np.percentile(results, percentiles, axis=1).T
+    tolerance = 8 * np.ptp(results, axis=1)[:, None] / bins + 1e-9 * np.abs(expected)
+    assert np.all(np.abs(table.iloc[:, 1:].to_numpy() - expected) <= tolerance)
+
+
+def test_accumulate_widening():
+    rng = np.random.default_rng(0)
+    counts = np.zeros((2, 8), dtype=np.int64)
+    low, width = np.array([0.0, 5.0]), np.array([1.0, 1e-9])
+    for scale in (1, 10, 100):
+        values = np.stack((rng.uniform(-scale, scale, 50), np.full(50, 5.0)))
+        uncertainty.accumulate(counts, low, width, values)
+        assert np.all(low <= values.min(axis=1)) and np.all(values.max(axis=1) < low + width * 8)
+    assert np.all(counts.sum(axis=1) == 150)
+    np.testing.assert_allclose(uncertainty.histogram_percentiles(counts, low, width, [50])[1], 5.0)
@@ -0,0 +1,185 @@
+"""Uncertainty propagates parameter distributions through the model with chunked Monte Carlo sampling."""
+
+import numpy as np
+import pandas as pd
+import model
+import scenarios
+
+
+parameters = {'ICEV': model.parameters_th, 'BEV': model.parameters_el}
+
+
+def configuration(powertrain, names, catalogues=None):
+    """
+    Collect the parameters of a configuration of the pre-set catalogues.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    names (list): Configuration name per contributor, e.g. ['Average_EU', 'Average_EU', 'Average_EU', 'EU_mix', 'Average_EU'].
+    catalogues (dict): Optional catalogue file per contributor replacing the default one.
+
+    Returns:
+    dict: Value of every model parameter, keyed by parameter name.
+    """
+    catalogues = catalogues or {}
+    values = {}
+    for contributor, file_name, name, labels in zip(scenarios.contributors[powertrain], scenarios.files[powertrain], names, parameters[powertrain]):
+        df = scenarios.read_catalogue(catalogues.get(contributor, file_name))
+        values.update(zip(labels, df[name].to_numpy(dtype=float)))
+    return values
+
+
+def uniform_between(powertrain, contributor, file_name, minimum, maximum):
+    """
+    Uniform distributions between two configurations of a catalogue (e.g. the min/max columns of thermal_ecoinvent.csv).
+    Parameters with the same value in both configurations are left out.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    contributor (str): Contributor of the catalogue ('body', 'engine', ...).
+    file_name (str): Catalogue file.
+    minimum (str): Name of the configuration holding the lower bounds.
+    maximum (str): Name of the configuration holding the upper bounds.
+
+    Returns:
+    dict: Distributions keyed by parameter name, as ('uniform', low, high).
+    """
+    labels = parameters[powertrain][scenarios.contributors[powertrain].index(contributor)]
+    df = scenarios.read_catalogue(file_name)
+    distributions = {}
+    for label, low, high in zip(labels, df[minimum].to_numpy(dtype=float), df[maximum].to_numpy(dtype=float)):
+        if low != high:
+            distributions[label] = ('uniform', float(min(low, high)), float(max(low, high)))
+    return distributions
+
+
+def draw(distribution, n, rng):
+    """
+    Draw n samples from a distribution.
+
+    Parameters:
+    distribution (tuple): ('uniform', low, high), ('triangular', low, mode, high) or ('normal', mean, standard deviation).
+    n (int): Number of samples.
+    rng (Generator): NumPy random generator.
+
+    Returns:
+    array: Samples.
+    """
+    kind, *arguments = distribution
+    if kind == 'uniform':
+        return rng.uniform(*arguments, n)
+    if kind == 'triangular':
+        return rng.triangular(*arguments, n)
+    if kind == 'normal':
+        return rng.normal(*arguments, n)
+    raise ValueError(f"Unknown distribution '{kind}', expected 'uniform', 'triangular' or 'normal'.")
+
+
+def evaluate(powertrain, base, samples):
+    """
+    Evaluate the model for sampled parameters, the other parameters being fixed to the base configuration.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    base (dict): Value of every model parameter (see configuration).
+    samples (dict): Sampled values (arrays of equal length) keyed by parameter name.
+
+    Returns:
+    tuple: EC, losses and nop arrays (see model.EC_th_batch and model.EC_el_batch).
+    """
+    unknown = set(samples) - set(base)
+    if unknown:
+        raise KeyError(f"Unknown parameters for {powertrain}: {sorted(unknown)}")
+    groups = [[samples.get(label, base[label]) for label in labels] for labels in parameters[powertrain]]
+    return scenarios.evaluators[powertrain](*groups)
+
+
+def accumulate(counts, low, width, values):
+    """
+    Add samples to fixed-size histograms (one row per quantity), widening the range of a row when samples fall outside.
+    A row is widened by doubling its bin width (merging pairs of bins), to the left or to the right of its range.
+
+    Parameters:
+    counts (array): Shape (n_quantities, bins), counts per bin, bins being even (updated in place).
+    low (array): Lower bound of the range of each row (updated in place).
+    width (array): Bin width of each row (updated in place).
+    values (array): Shape (n_quantities, n), samples to add.
+    """
+    bins = counts.shape[1]
+    for q, row in enumerate(values):
+        while row.min() < low[q]:
+            counts[q] = np.concatenate((np.zeros(bins // 2, dtype=counts.dtype), counts[q].reshape(-1, 2).sum(axis=1)))
+            low[q] -= width[q] * bins
+            width[q] *= 2
+        while row.max() >= low[q] + width[q] * bins:
+            counts[q] = np.concatenate((counts[q].reshape(-1, 2).sum(axis=1), np.zeros(bins // 2, dtype=counts.dtype)))
+            width[q] *= 2
+        counts[q] += np.bincount(np.clip(((row - low[q]) / width[q]).astype(int), 0, bins - 1), minlength=bins)
+
+
+def histogram_percentiles(counts, low, width, percentiles):
+    """
+    Percentiles of histograms (see accumulate), interpolated linearly within the bins.
+
+    Returns:
+    array: Shape (n_quantities, n_percentiles).
+    """
+    bins = counts.shape[1]
+    table = np.empty((len(counts), len(percentiles)))
+    for q, row in enumerate(counts):
+        cumulative = np.concatenate(([0], np.cumsum(row)))
+        edges = low[q] + width[q] * np.arange(bins + 1)
+        # Edges of the bins holding samples (flat parts of the cumulative counts skipped)
+        kept = np.concatenate(([True], row > 0))
+        table[q] = np.interp(np.array(percentiles) / 100 * cumulative[-1], cumulative[kept], edges[kept])
+    return table
+
+
+def monte_carlo(powertrain, base, distributions, n=10**6, chunk_size=10**5, percentiles=(2.5, 25, 50, 75, 97.5), seed=None, bins=2**14):
+    """
+    Propagate parameter uncertainties through the model by Monte Carlo sampling.
+    Samples are drawn and evaluated chunk by chunk so that the memory stays bounded by chunk_size and bins:
+    the mean is accumulated exactly and the percentiles are estimated from histograms of EC and of the losses
+    (see accumulate), within a few bin widths. When n fits in one chunk, the percentiles are exact.
+
+    Parameters:
+    powertrain (str): 'ICEV' or 'BEV'.
+    base (dict): Value of every model parameter (see configuration).
+    distributions (dict): Distribution of the uncertain parameters keyed by parameter name (see draw).
+    n (int): Number of samples.
+    chunk_size (int): Number of samples evaluated at once.
+    percentiles (tuple): Percentiles to report.
+    seed (int): Seed of the random generator.
+    bins (int): Number of bins of the histograms (even), setting the resolution of the percentiles.
+
+    Returns:
+    DataFrame: Mean and percentiles (columns) of EC and of each loss term (rows).
+    """
+    rng = np.random.default_rng(seed)
+    quantities = [q for q in scenarios.quantities[powertrain] if not q.startswith('nop')]
+    total = np.zeros(len(quantities))
+    counts = np.zeros((len(quantities), bins), dtype=np.int64)
+
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+        samples = {name: draw(distribution, size, rng) for name, distribution in distributions.items()}
+        EC, losses, nop = evaluate(powertrain, base, samples)
+        results = np.empty((len(quantities), size))
+        results[0] = EC
+        results[1:] = np.reshape(losses, (len(losses), -1))
+        total += results.sum(axis=1)
+
+        if n <= chunk_size:
+            table = np.percentile(results, percentiles, axis=1).T
+        else:
+            if start == 0:
+                # Initial ranges: those of the first chunk
+                low = results.min(axis=1)
+                width = np.maximum(results.max(axis=1) - low, 1e-9 * np.maximum(np.abs(low), 1)) / (bins - 1)
+            accumulate(counts, low, width, results)
+
+    if n > chunk_size:
+        table = histogram_percentiles(counts, low, width, percentiles)
+    table = pd.DataFrame(table, index=quantities, columns=[f'P{q:g}' for q in percentiles])
+    table.insert(0, 'mean', total / n)
+    return table